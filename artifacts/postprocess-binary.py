@@ -24,6 +24,7 @@ from __future__ import annotations
 import os
 from pathlib import Path
 import re
+import shutil
 import subprocess
 
 from common.argparse import TypedArgs
@@ -68,7 +69,7 @@ def library_symbols(file: Path) -> list[str]:
 class Args(TypedArgs):
     file: Path
     output: Path
-    debuginfo: Path
+    debuginfo: Path | None
 
 
 args = Args(
@@ -76,14 +77,19 @@ args = Args(
 )
 args.add_arg('-o', '--output', type=Path, required=True, help='output file')
 args.add_arg(
-    '-d', '--debuginfo', type=Path, required=True, help='output debug symbols'
+    '-d',
+    '--debuginfo',
+    type=Path,
+    help='output debug symbols (default: leave them in place)',
 )
 args.add_arg('file', type=Path, help='input file')
 args.parse()
 host = meson_host()
 
 # split debuginfo
-if host == 'darwin':
+if args.debuginfo is None:
+    shutil.copy2(args.file, args.output)
+elif host == 'darwin':
     subprocess.check_call(
         [os.environ['DSYMUTIL'], '-o', args.debuginfo, args.file]
     )
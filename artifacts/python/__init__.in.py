@@ -18,21 +18,256 @@
 
 from __future__ import annotations
 
-from ctypes import CDLL, cdll
-import importlib.resources as res
-import platform
+import os
+import sys
+import threading
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from ctypes import CDLL
+
+    # loaded on first access by __getattr__()
+    libopenslide1: CDLL
+
+# Optional builds of libopenslide for newer CPUs, most preferred first.
+# Each is shipped in a package subdirectory of the same name.
+_VARIANTS = ('x86-64-v4', 'x86-64-v3', 'x86-64-v2')
+# Environment variable forcing a specific variant, or "baseline"
+_VARIANT_ENV = 'OPENSLIDE_BIN_VARIANT'
+
+# CPU feature flags required by each x86-64 microarchitecture level, in
+# addition to those of the previous level, named as in /proc/cpuinfo
+_VARIANT_FLAGS = {
+    'x86-64-v2': {'cx16', 'lahf_lm', 'popcnt', 'sse4_1', 'sse4_2', 'ssse3'},
+    'x86-64-v3': {
+        'abm',
+        'avx',
+        'avx2',
+        'bmi1',
+        'bmi2',
+        'f16c',
+        'fma',
+        'movbe',
+        'xsave',
+    },
+    'x86-64-v4': {'avx512bw', 'avx512cd', 'avx512dq', 'avx512f', 'avx512vl'},
+}
+# CPUID leaf, output register (EAX, EBX, ECX, EDX), and bit of each flag
+_CPUID_FLAGS = {
+    'abm': (0x80000001, 2, 5),
+    'avx': (1, 2, 28),
+    'avx2': (7, 1, 5),
+    'avx512bw': (7, 1, 30),
+    'avx512cd': (7, 1, 28),
+    'avx512dq': (7, 1, 17),
+    'avx512f': (7, 1, 16),
+    'avx512vl': (7, 1, 31),
+    'bmi1': (7, 1, 3),
+    'bmi2': (7, 1, 8),
+    'cx16': (1, 2, 13),
+    'f16c': (1, 2, 29),
+    'fma': (1, 2, 12),
+    'lahf_lm': (0x80000001, 2, 0),
+    'movbe': (1, 2, 22),
+    'popcnt': (1, 2, 23),
+    'sse4_1': (1, 2, 19),
+    'sse4_2': (1, 2, 20),
+    'ssse3': (1, 2, 9),
+    'xsave': (1, 2, 26),
+}
+# x86-64 Windows function storing CPUID(leaf=ECX, subleaf=EDX) to four
+# uint32s at R8
+_CPUID_CODE = bytes.fromhex(
+    '53'  # push rbx
+    '89c8'  # mov eax, ecx
+    '89d1'  # mov ecx, edx
+    '0fa2'  # cpuid
+    '418900'  # mov [r8], eax
+    '41895804'  # mov [r8+4], ebx
+    '41894808'  # mov [r8+8], ecx
+    '4189500c'  # mov [r8+12], edx
+    '5b'  # pop rbx
+    'c3'  # ret
+)
+# IsProcessorFeaturePresent() features confirming that Windows saves the
+# register state needed by each level
+_WINDOWS_VARIANT_FEATURES = {
+    'x86-64-v3': 40,  # PF_AVX2_INSTRUCTIONS_AVAILABLE
+    'x86-64-v4': 41,  # PF_AVX512F_INSTRUCTIONS_AVAILABLE
+}
+
+
+def _cpuid_flags(cpuid: Callable[[int, int], tuple[int, ...]]) -> set[str]:
+    '''Return the CPU feature flags reported by a CPUID function taking a
+    leaf and subleaf.'''
+    # basic and extended leaves each report their highest leaf
+    max_leaf = {base: cpuid(base, 0)[0] for base in (0, 0x80000000)}
+    regs = {
+        leaf: cpuid(leaf, 0)
+        for leaf, _, _ in _CPUID_FLAGS.values()
+        if leaf <= max_leaf[leaf & 0x80000000]
+    }
+    return {
+        flag
+        for flag, (leaf, reg, bit) in _CPUID_FLAGS.items()
+        if leaf in regs and regs[leaf][reg] >> bit & 1
+    }
+
+
+def _windows_flags(kernel32: Any) -> set[str]:
+    '''Return the CPU feature flags on Windows, by running CPUID from an
+    executable buffer.'''
+    from ctypes import (
+        CFUNCTYPE,
+        POINTER,
+        byref,
+        c_size_t,
+        c_uint32,
+        c_ulong,
+        c_void_p,
+        memmove,
+    )
+
+    kernel32.VirtualAlloc.restype = c_void_p
+    kernel32.VirtualAlloc.argtypes = [c_void_p, c_size_t, c_ulong, c_ulong]
+    kernel32.VirtualProtect.argtypes = [
+        c_void_p,
+        c_size_t,
+        c_ulong,
+        POINTER(c_ulong),
+    ]
+    kernel32.VirtualFree.argtypes = [c_void_p, c_size_t, c_ulong]
+    # MEM_COMMIT | MEM_RESERVE, PAGE_READWRITE
+    buf = kernel32.VirtualAlloc(None, len(_CPUID_CODE), 0x3000, 0x04)
+    if not buf:
+        raise OSError('VirtualAlloc failed')
+    try:
+        memmove(buf, _CPUID_CODE, len(_CPUID_CODE))
+        old = c_ulong()
+        # PAGE_EXECUTE_READ
+        if not kernel32.VirtualProtect(
+            buf, len(_CPUID_CODE), 0x20, byref(old)
+        ):
+            raise OSError('VirtualProtect failed')
+        func = CFUNCTYPE(None, c_uint32, c_uint32, POINTER(c_uint32))(buf)
+
+        def cpuid(leaf: int, subleaf: int) -> tuple[int, ...]:
+            out = (c_uint32 * 4)()
+            func(leaf, subleaf, out)
+            return tuple(out)
+
+        return _cpuid_flags(cpuid)
+    finally:
+        # MEM_RELEASE
+        kernel32.VirtualFree(buf, 0, 0x8000)
+
+
+def _cpu_variants() -> set[str]:
+    '''Return the variants supported by the current CPU.  If the CPU's
+    features can't be determined, return none, selecting the baseline
+    build.'''
+    import platform
+
+    if platform.machine().lower() not in ('x86_64', 'amd64'):
+        return set()
+    # variants whose registers the OS doesn't enable
+    os_unsupported: set[str] = set()
+    if sys.platform == 'win32':
+        from ctypes import windll
+
+        try:
+            flags = _windows_flags(windll.kernel32)
+        except OSError:
+            return set()
+        present = windll.kernel32.IsProcessorFeaturePresent
+        # CPUID reports what the CPU supports, not whether the OS enables
+        # the wider registers
+        os_unsupported = {
+            variant
+            for variant, feature in _WINDOWS_VARIANT_FEATURES.items()
+            if not present(feature)
+        }
+    elif sys.platform == 'linux':
+        try:
+            with open('/proc/cpuinfo') as fh:
+                flags = next(
+                    set(line.split(':', 1)[1].split())
+                    for line in fh
+                    if line.startswith('flags')
+                )
+        except (OSError, StopIteration):
+            return set()
+    else:
+        return set()
+    supported: set[str] = set()
+    for variant in reversed(_VARIANTS):
+        if not _VARIANT_FLAGS[variant] <= flags or variant in os_unsupported:
+            break
+        supported.add(variant)
+    return supported
+
+
+def _select_variant() -> str | None:
+    '''Return the best shipped variant for the current CPU, honoring the
+    environment override, or None for the baseline build.'''
+    import importlib.resources as res
+
+    pkg = res.files(__name__)
+    available = [v for v in _VARIANTS if pkg.joinpath(v).is_dir()]
+    override = os.environ.get(_VARIANT_ENV)
+    if override:
+        if override == 'baseline':
+            return None
+        if override not in available:
+            raise ImportError(
+                f'{_VARIANT_ENV}: variant "{override}" not available; '
+                + f'choose from: {", ".join(["baseline"] + available)}'
+            )
+        return override
+    supported = _cpu_variants()
+    for variant in available:
+        if variant in supported:
+            return variant
+    return None
 
 
 def _load_openslide() -> CDLL:
+    from ctypes import cdll
+    import importlib.resources as res
+    import platform
+
     if platform.system() == 'Windows':
         name = 'libopenslide-1.dll'
     elif platform.system() == 'Darwin':
         name = 'libopenslide.1.dylib'
     else:
         name = 'libopenslide.so.1'
-    with res.as_file(res.files(__name__).joinpath(name)) as path:
+    dir = res.files(__name__)
+    variant = _select_variant()
+    if variant is not None:
+        dir = dir.joinpath(variant)
+    with res.as_file(dir.joinpath(name)) as path:
         return cdll.LoadLibrary(path.as_posix())
 
 
-libopenslide1 = _load_openslide()
+# Loading the library is expensive, so defer it until first use.  This
+# keeps processes that never call into OpenSlide, such as ones that only
+# check __version__, fast to start.
+_load_lock = threading.Lock()
+
+
+def __getattr__(name: str) -> Any:
+    if name != 'libopenslide1':
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    with _load_lock:
+        # another thread may have loaded it while we waited
+        lib = globals().get(name)
+        if lib is None:
+            lib = _load_openslide()
+            # bypass __getattr__ from now on
+            globals()[name] = lib
+    return lib
+
+
 __version__ = '@version@'
@@ -0,0 +1,210 @@
+#
+# openslide-bin - Wrapper for OpenSlide binary build
+#
+# Copyright (c) 2026 Benjamin Gilbert
+#
+# This library is free software; you can redistribute it and/or modify it
+# under the terms of version 2.1 of the GNU Lesser General Public License
+# as published by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
+# License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+'''asyncio interface to OpenSlide.
+
+Blocking OpenSlide calls run on a bounded thread pool, shared by all
+slides unless the caller provides one.  Each slide also limits its number
+of concurrent calls, so one busy slide can't monopolize the pool.
+Concurrent requests for the same region share a single read.
+
+Cancelling a request that hasn't started running drops it.  OpenSlide
+calls can't be interrupted, so a cancelled request that's already running
+finishes in the background and its result is discarded.'''
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import Executor, ThreadPoolExecutor
+import os
+import threading
+from types import TracebackType
+from typing import TypeVar
+
+from openslide_bin.handle import Slide
+from openslide_bin.region import Region, read_region
+
+T = TypeVar('T')
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _after_fork_in_child() -> None:
+    # the pool's threads don't exist in the child
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def default_executor() -> ThreadPoolExecutor:
+    '''Return the thread pool shared by slides that weren't given one.'''
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                min(32, (os.cpu_count() or 1) + 4),
+                thread_name_prefix='openslide-aio',
+            )
+        return _executor
+
+
+class _Read:
+    '''A read shared by concurrent requests for the same region.'''
+
+    def __init__(self, task: asyncio.Task[memoryview]):
+        self.task = task
+        self.waiters = 0
+
+
+class AsyncSlide:
+    '''An OpenSlide handle with coroutine methods.  Create with open().'''
+
+    def __init__(
+        self,
+        slide: Slide,
+        executor: Executor,
+        max_concurrency: int,
+    ):
+        self.slide = slide
+        self._executor = executor
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._reads: dict[Region, _Read] = {}
+        # number of OpenSlide calls running on worker threads, so close()
+        # can wait for them
+        self._active = 0
+        self._closing = False
+        self._cond = threading.Condition()
+
+    @classmethod
+    async def open(
+        cls,
+        path: str | os.PathLike[str],
+        *,
+        executor: Executor | None = None,
+        max_concurrency: int = 4,
+    ) -> AsyncSlide:
+        '''Open a slide.  Run at most max_concurrency of its OpenSlide calls
+        at once, on executor or a shared default thread pool.'''
+        if max_concurrency < 1:
+            raise ValueError('max_concurrency must be positive')
+        executor = executor or default_executor()
+        slide = await asyncio.get_running_loop().run_in_executor(
+            executor, Slide, path
+        )
+        return cls(slide, executor, max_concurrency)
+
+    async def __aenter__(self) -> AsyncSlide:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        await self.close()
+
+    def _guarded(self, func: Callable[[], T]) -> T:
+        # runs on a worker thread
+        with self._cond:
+            if self._closing:
+                raise ValueError('Slide is closed')
+            self._active += 1
+        try:
+            return func()
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+    async def _call(self, func: Callable[[], T]) -> T:
+        async with self._semaphore:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._guarded, func
+            )
+
+    async def read_region(
+        self, level: int, x: int, y: int, w: int, h: int
+    ) -> memoryview:
+        '''Read a region and return a read-only view of its premultiplied
+        ARGB pixels.  Concurrent requests for the same region share one
+        read and receive the same view.'''
+        region = Region(level, x, y, w, h)
+        read = self._reads.get(region)
+        if read is None:
+            read = _Read(asyncio.ensure_future(self._read_region(region)))
+            self._reads[region] = read
+        read.waiters += 1
+        try:
+            # don't let one waiter's cancellation cancel the others
+            return await asyncio.shield(read.task)
+        finally:
+            read.waiters -= 1
+            if read.waiters == 0:
+                if self._reads.get(region) is read:
+                    del self._reads[region]
+                # the last waiter went away before the read finished
+                read.task.cancel()
+
+    async def _read_region(self, region: Region) -> memoryview:
+        def read() -> memoryview:
+            buf = bytearray(region.nbytes)
+            read_region(self.slide, buf, *region)
+            return memoryview(buf).toreadonly()
+
+        return await self._call(read)
+
+    async def properties(self) -> dict[str, str]:
+        '''Return the slide properties.'''
+        return await self._call(self.slide.properties)
+
+    async def associated_image_names(self) -> list[str]:
+        '''Return the names of the slide's associated images.'''
+        return await self._call(self.slide.associated_image_names)
+
+    async def read_associated_image(
+        self, name: str
+    ) -> tuple[int, int, memoryview]:
+        '''Read an associated image and return its width, height, and
+        a read-only view of its premultiplied ARGB pixels.'''
+
+        def read() -> tuple[int, int, memoryview]:
+            w, h, buf = self.slide.read_associated_image(name)
+            return w, h, memoryview(buf).cast('B').toreadonly()
+
+        return await self._call(read)
+
+    async def close(self) -> None:
+        '''Close the slide, after waiting for running OpenSlide calls to
+        finish.'''
+        for read in list(self._reads.values()):
+            read.task.cancel()
+
+        def close() -> None:
+            with self._cond:
+                self._closing = True
+                self._cond.wait_for(lambda: self._active == 0)
+            self.slide.close()
+
+        await asyncio.get_running_loop().run_in_executor(self._executor, close)
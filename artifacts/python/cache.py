@@ -0,0 +1,139 @@
+#
+# openslide-bin - Wrapper for OpenSlide binary build
+#
+# Copyright (c) 2026 Benjamin Gilbert
+#
+# This library is free software; you can redistribute it and/or modify it
+# under the terms of version 2.1 of the GNU Lesser General Public License
+# as published by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
+# License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+'''OpenSlide tile caches shared between handles.
+
+By default, every OpenSlide handle has a private tile cache, so a process
+with many open slides can use a lot of memory.  A Cache can instead be
+attached to any number of handles, bounding their combined cache size.
+
+OpenSlide reference-counts caches: each attached handle holds a reference
+that it drops when it's closed, and the Cache object holds one more until
+it's released.  The cache is freed once all of them are gone, so a Cache
+can be released while attached handles are still in use.
+
+A Cache inherited by a fork() child is released there without calling
+into OpenSlide, and the child gets a new shared cache.'''
+
+from __future__ import annotations
+
+import os
+import threading
+from types import TracebackType
+import weakref
+
+from openslide_bin import bindings
+from openslide_bin.handle import Slide
+
+# OpenSlide's default per-handle cache size
+DEFAULT_CAPACITY = 32 << 20
+
+
+class Cache:
+    '''An OpenSlide tile cache holding up to capacity bytes of decoded
+    tiles.'''
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        if capacity < 0:
+            raise ValueError(f'Invalid cache capacity: {capacity}')
+        self.capacity = capacity
+        self._cache: int | None = bindings.openslide_cache_create(capacity)
+        self._lock = threading.Lock()
+        _caches.add(self)
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({self.capacity})'
+
+    def __enter__(self) -> Cache:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.release()
+
+    @property
+    def released(self) -> bool:
+        return self._cache is None
+
+    def attach(self, slide: Slide) -> None:
+        '''Use this cache for slide instead of its current one.'''
+        with self._lock:
+            if self._cache is None:
+                raise ValueError('Cache has been released')
+            bindings.openslide_set_cache(slide, self._cache)
+        slide.check()
+
+    def open(self, path: str | os.PathLike[str]) -> Slide:
+        '''Open a Slide using this cache.'''
+        slide = Slide(path)
+        try:
+            self.attach(slide)
+        except BaseException:
+            slide.close()
+            raise
+        return slide
+
+    def release(self) -> None:
+        '''Drop this object's reference to the cache.  Attached handles
+        continue using it until they're closed.'''
+        with self._lock:
+            if self._cache is not None:
+                bindings.openslide_cache_release(self._cache)
+                self._cache = None
+
+
+# caches to abandon in a fork child
+_caches: weakref.WeakSet[Cache] = weakref.WeakSet()
+_shared: Cache | None = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache(capacity: int | None = None) -> Cache:
+    '''Return the process-wide shared cache, creating it on first use.  If
+    capacity is specified and differs from the current cache's, replace the
+    shared cache with a new one; handles attached to the old cache keep
+    using it until they're closed.'''
+    global _shared
+    with _shared_lock:
+        if _shared is None or (
+            capacity is not None and capacity != _shared.capacity
+        ):
+            if _shared is not None:
+                _shared.release()
+            _shared = Cache(
+                capacity if capacity is not None else DEFAULT_CAPACITY
+            )
+        return _shared
+
+
+def _after_fork_in_child() -> None:
+    global _shared, _shared_lock
+    for cache in _caches:
+        cache._cache = None
+        cache._lock = threading.Lock()
+    _caches.clear()
+    _shared = None
+    _shared_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
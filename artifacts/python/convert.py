@@ -0,0 +1,383 @@
+#
+# openslide-bin - Wrapper for OpenSlide binary build
+#
+# Copyright (c) 2026 Benjamin Gilbert
+#
+# This library is free software; you can redistribute it and/or modify it
+# under the terms of version 2.1 of the GNU Lesser General Public License
+# as published by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
+# License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+'''Convert OpenSlide pixels to non-premultiplied RGBA.
+
+OpenSlide produces premultiplied ARGB, one native-endian 32-bit word per
+pixel.  Most image libraries want non-premultiplied RGBA bytes.  If NumPy
+is available, the conversion is vectorized, with a lookup table for
+un-premultiplying.  Otherwise, channels are swizzled with slice assignments
+and only translucent pixels, which are rare in practice, are handled one
+at a time.
+
+Pixels can also be composited onto a background color to produce RGB, or
+resized with an area-averaging filter.  The filter can consume its source
+in strips, accumulating each one's contribution, so the whole source never
+has to be in memory.'''
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+import sys
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from _typeshed import ReadableBuffer, WriteableBuffer
+
+try:
+    import numpy as np
+
+    HAVE_NUMPY = True
+except ImportError:
+    HAVE_NUMPY = False
+
+
+@lru_cache(maxsize=None)
+def _unpremultiply_tables() -> list[bytes]:
+    '''Return a table, indexed by alpha, of 256-byte translation tables
+    mapping a premultiplied channel value to a non-premultiplied one.'''
+    tables = [bytes(256)]
+    for a in range(1, 256):
+        tables.append(
+            bytes(min(255, (c * 255 + a // 2) // a) for c in range(256))
+        )
+    return tables
+
+
+# byte offsets of A, R, G, B within a native-endian ARGB word
+_OFFSETS = (3, 2, 1, 0) if sys.byteorder == 'little' else (0, 1, 2, 3)
+
+
+def argb_to_rgba(
+    src: ReadableBuffer, dest: WriteableBuffer | None = None
+) -> WriteableBuffer:
+    '''Convert premultiplied ARGB pixels in src to non-premultiplied RGBA
+    bytes in dest, which may be src itself, and return dest.  If dest is
+    None, return a new bytearray.'''
+    src_view = memoryview(src).cast('B')
+    if src_view.nbytes % 4:
+        raise ValueError('Source buffer is not a whole number of pixels')
+    if dest is None:
+        dest = bytearray(src_view.nbytes)
+    dest_view = memoryview(dest)
+    if dest_view.readonly:
+        raise TypeError('Destination buffer is read-only')
+    dest_view = dest_view.cast('B')
+    if dest_view.nbytes != src_view.nbytes:
+        raise ValueError(
+            f'Destination buffer size {dest_view.nbytes} != '
+            + f'source size {src_view.nbytes}'
+        )
+    if HAVE_NUMPY:
+        _convert_numpy(src_view, dest_view)
+    else:
+        _convert_python(src_view, dest_view)
+    return dest
+
+
+def _convert_numpy(src: memoryview, dest: memoryview) -> None:
+    pixels = np.frombuffer(src, dtype=np.uint32)
+    out = np.frombuffer(dest, dtype=np.uint8).reshape(-1, 4)
+    # extract all channels before writing, in case dest aliases src
+    a = (pixels >> 24).astype(np.uint8)
+    rgb = np.stack(
+        [(pixels >> shift).astype(np.uint8) for shift in (16, 8, 0)],
+        axis=1,
+    )
+    translucent = (a != 255) & (a != 0)
+    if translucent.any():
+        # premultiplied channels of transparent pixels are already 0
+        rgb[translucent] = _unpremultiply_numpy()[
+            a[translucent, np.newaxis], rgb[translucent]
+        ]
+    out[:, :3] = rgb
+    out[:, 3] = a
+
+
+@lru_cache(maxsize=None)
+def _unpremultiply_numpy() -> np.ndarray:
+    '''Return the un-premultiply table as a 256 x 256 array indexed by
+    alpha and channel value.'''
+    return np.frombuffer(
+        b''.join(_unpremultiply_tables()), dtype=np.uint8
+    ).reshape(256, 256)
+
+
+def _convert_python(src: memoryview, dest: memoryview) -> None:
+    # copy out all channels before writing, in case dest aliases src
+    a, r, g, b = (bytes(src[off::4]) for off in _OFFSETS)
+    dest[0::4] = r
+    dest[1::4] = g
+    dest[2::4] = b
+    dest[3::4] = a
+    # find translucent pixels by alpha value, without a Python-level scan
+    # of opaque or transparent ones
+    translucent = a.translate(bytes([0] + [1] * 254 + [0]))
+    i = translucent.find(1)
+    if i != -1:
+        tables = _unpremultiply_tables()
+    while i != -1:
+        table = tables[a[i]]
+        base = i * 4
+        dest[base] = table[r[i]]
+        dest[base + 1] = table[g[i]]
+        dest[base + 2] = table[b[i]]
+        i = translucent.find(1, i + 1)
+
+
+def argb_to_rgb(
+    src: ReadableBuffer,
+    dest: WriteableBuffer | None = None,
+    background: tuple[int, int, int] = (255, 255, 255),
+) -> WriteableBuffer:
+    '''Composite premultiplied ARGB pixels in src onto an opaque background
+    color, write RGB bytes to dest, and return dest.  If dest is None,
+    return a new bytearray.'''
+    src_view = memoryview(src).cast('B')
+    if src_view.nbytes % 4:
+        raise ValueError('Source buffer is not a whole number of pixels')
+    count = src_view.nbytes // 4
+    if dest is None:
+        dest = bytearray(count * 3)
+    dest_view = memoryview(dest)
+    if dest_view.readonly:
+        raise TypeError('Destination buffer is read-only')
+    dest_view = dest_view.cast('B')
+    if dest_view.nbytes != count * 3:
+        raise ValueError(
+            f'Destination buffer size {dest_view.nbytes} != '
+            + f'{count} RGB pixels'
+        )
+    if HAVE_NUMPY:
+        pixels = np.frombuffer(src_view, dtype=np.uint32)
+        out = np.frombuffer(dest_view, dtype=np.uint8).reshape(-1, 3)
+        alpha = pixels >> 24
+        for i, shift in enumerate((16, 8, 0)):
+            # premultiplied, so the sum can't exceed 255
+            out[:, i] = ((pixels >> shift) & 0xFF) + (
+                (255 - alpha) * background[i] + 127
+            ) // 255
+        return dest
+    a, r, g, b = (bytes(src_view[off::4]) for off in _OFFSETS)
+    dest_view[0::3] = r
+    dest_view[1::3] = g
+    dest_view[2::3] = b
+    # composite pixels that aren't opaque, one at a time
+    not_opaque = a.translate(bytes([1] * 255 + [0]))
+    i = not_opaque.find(1)
+    while i != -1:
+        uncovered = 255 - a[i]
+        for j, channel in enumerate((r, g, b)):
+            dest_view[i * 3 + j] = (
+                channel[i] + (uncovered * background[j] + 127) // 255
+            )
+        i = not_opaque.find(1, i + 1)
+    return dest
+
+
+def resize_argb(
+    src: ReadableBuffer, src_w: int, src_h: int, w: int, h: int
+) -> bytearray:
+    '''Resize src_w x src_h premultiplied ARGB pixels to w x h with a
+    BoxFilter and return them in a new bytearray.'''
+    src_view = memoryview(src).cast('B')
+    if src_view.nbytes != src_w * src_h * 4:
+        raise ValueError(
+            f'Source buffer size {src_view.nbytes} != {src_w} x {src_h} pixels'
+        )
+    if (w, h) == (src_w, src_h):
+        return bytearray(src_view)
+    box = BoxFilter(src_w, src_h, w, h)
+    box.add(box.filter(src_view, 0))
+    return box.result()
+
+
+def _box_edges(
+    start: int, stop: int, total: int, n: int
+) -> tuple[int, list[int], list[int], list[float]]:
+    '''Find the destination pixels covering source pixels [start, stop) of
+    an axis resized from total to n pixels.  Return the first of them, j0,
+    and for each boundary between destination pixels from j0 on: the
+    source pixel containing it, clamped to [start, stop], and the pixel's
+    uncovered fraction if it's in range and split by the boundary, with
+    its index.  Source indices are relative to start.'''
+    first = max(0, start * n // total - 1)
+    last = min(n, -(-stop * n // total) + 1)
+    starts = []
+    edges = []
+    weights = []
+    for j in range(first, last + 1):
+        idx, rem = divmod(j * total, n)
+        starts.append(min(max(idx, start), stop) - start)
+        if rem and start <= idx < stop:
+            edges.append(idx - start)
+            weights.append(rem / n)
+        else:
+            edges.append(0)
+            weights.append(0.0)
+    return first, starts, edges, weights
+
+
+class BoxFilter:
+    '''Resize src_w x src_h premultiplied ARGB pixels to w x h, averaging
+    the source pixels covered by each destination pixel and weighting
+    partly covered ones by their coverage.  The source can be supplied in
+    horizontal strips, in any order, so only one strip needs to be in
+    memory at a time: filter() computes the contribution of a strip and
+    can run on any thread, and add() accumulates it.  Sums are accumulated
+    in single-precision floats with NumPy, and in Python floats without
+    it.'''
+
+    def __init__(self, src_w: int, src_h: int, w: int, h: int):
+        if src_w < 1 or src_h < 1:
+            raise ValueError(f'Invalid source size {src_w} x {src_h}')
+        if w < 1 or h < 1:
+            raise ValueError(f'Invalid size {w} x {h}')
+        self.src_w = src_w
+        self.src_h = src_h
+        self.w = w
+        self.h = h
+        self._numpy = HAVE_NUMPY
+        self._acc: np.ndarray | array[float]
+        if self._numpy:
+            self._acc = np.zeros((h, w, 4), dtype=np.float32)
+        else:
+            self._acc = array('d', bytes(h * w * 4 * 8))
+        # horizontal boundaries are the same for every strip
+        self._columns = _box_edges(0, src_w, src_w, w)
+
+    def __repr__(self) -> str:
+        return (
+            f'{self.__class__.__name__}({self.src_w}, {self.src_h}, '
+            + f'{self.w}, {self.h})'
+        )
+
+    def filter(self, src: ReadableBuffer, y: int) -> tuple[int, Any]:
+        '''Compute the contribution of the whole source rows in src, the
+        first of which is row y, for passing to add().'''
+        src_view = memoryview(src).cast('B')
+        rows, extra = divmod(src_view.nbytes, self.src_w * 4)
+        if extra or rows < 1 or y < 0 or y + rows > self.src_h:
+            raise ValueError(
+                f'Source buffer size {src_view.nbytes} is not whole rows '
+                + f'within {self.src_w} x {self.src_h} pixels at row {y}'
+            )
+        edges = _box_edges(y, y + rows, self.src_h, self.h)
+        if self._numpy:
+            pixels = np.frombuffer(src_view, dtype=np.uint8).reshape(
+                rows, self.src_w, 4
+            )
+            # each byte is one channel; summing them independently keeps
+            # premultiplied pixels valid regardless of byte order
+            cols = _box_sum_numpy(pixels.swapaxes(0, 1), self._columns)
+            return edges[0], _box_sum_numpy(cols.swapaxes(0, 1), edges)
+        return edges[0], _box_sum_python(
+            src_view, self.src_w, self._columns, edges
+        )
+
+    def add(self, contribution: tuple[int, Any]) -> None:
+        '''Accumulate the result of filter().'''
+        first, sums = contribution
+        if self._numpy:
+            assert isinstance(self._acc, np.ndarray)
+            self._acc[first : first + len(sums)] += sums
+            return
+        assert isinstance(self._acc, array)
+        for i, vec in enumerate(sums):
+            start = (first + i) * self.w * 4
+            end = start + len(vec)
+            self._acc[start:end] = array(
+                'd', map(float.__add__, self._acc[start:end], vec)
+            )
+
+    def result(self) -> bytearray:
+        '''Return the resized pixels, after every source row has been
+        added.'''
+        scale = self.w * self.h / (self.src_w * self.src_h)
+        if isinstance(self._acc, np.ndarray):
+            out = np.clip(np.rint(self._acc * np.float32(scale)), 0, 255)
+            return bytearray(out.astype(np.uint8).tobytes())
+        return bytearray(
+            min(255, max(0, int(v * scale + 0.5))) for v in self._acc
+        )
+
+
+def _box_sum_numpy(
+    a: np.ndarray, edges: tuple[int, list[int], list[int], list[float]]
+) -> np.ndarray:
+    '''Sum array a along axis 0 into the destination pixels described by
+    edges, as returned by _box_edges().'''
+    _, starts, edge_idx, edge_weights = edges
+    n = len(starts) - 1
+    sums = np.zeros((n,) + a.shape[1:], dtype=np.float32)
+    # reduceat needs in-range indices, and extends the last run to the end
+    valid = bisect_left(starts, len(a), hi=n)
+    if valid:
+        idx = np.array(starts[:valid], dtype=np.intp)
+        sums[:valid] = np.add.reduceat(a, idx, axis=0, dtype=np.float32)
+        # reduceat returns the starting element for empty runs
+        sums[:valid][idx == np.array(starts[1 : valid + 1])] = 0
+    weights = np.array(edge_weights, dtype=np.float32).reshape(
+        (-1,) + (1,) * (a.ndim - 1)
+    )
+    # fractional source pixels at the box edges
+    split = weights * a[np.array(edge_idx, dtype=np.intp)]
+    sums += split[1:] - split[:-1]
+    return sums
+
+
+def _box_sum_python(
+    src: memoryview,
+    src_w: int,
+    columns: tuple[int, list[int], list[int], list[float]],
+    edges: tuple[int, list[int], list[int], list[float]],
+) -> list[list[float]]:
+    '''Sum whole ARGB rows in src into the destination columns and rows
+    described by columns and edges, as returned by _box_edges().'''
+    _, col_starts, col_edges, col_weights = columns
+    w = len(col_starts) - 1
+    row_bytes = src_w * 4
+
+    def filter_row(r: int) -> list[float]:
+        row = src[r * row_bytes : (r + 1) * row_bytes]
+        out = [0.0] * (w * 4)
+        for c in range(4):
+            channel = bytes(row[c::4])
+            for x in range(w):
+                out[x * 4 + c] = (
+                    sum(channel[col_starts[x] : col_starts[x + 1]])
+                    - col_weights[x] * channel[col_edges[x]]
+                    + col_weights[x + 1] * channel[col_edges[x + 1]]
+                )
+        return out
+
+    rows = [filter_row(r) for r in range(src.nbytes // row_bytes)]
+    _, starts, edge_idx, edge_weights = edges
+    sums = []
+    for i in range(len(starts) - 1):
+        vec = [0.0] * (w * 4)
+        for r in range(starts[i], starts[i + 1]):
+            vec = [a + b for a, b in zip(vec, rows[r])]
+        for j, sign in ((i, -1), (i + 1, 1)):
+            weight = sign * edge_weights[j]
+            if weight:
+                vec = [a + weight * b for a, b in zip(vec, rows[edge_idx[j]])]
+        sums.append(vec)
+    return sums
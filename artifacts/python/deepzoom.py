@@ -0,0 +1,217 @@
+#
+# openslide-bin - Wrapper for OpenSlide binary build
+#
+# Copyright (c) 2026 Benjamin Gilbert
+#
+# This library is free software; you can redistribute it and/or modify it
+# under the terms of version 2.1 of the GNU Lesser General Public License
+# as published by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
+# License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+'''Deep Zoom tiles from OpenSlide slides.
+
+Each Deep Zoom level is read from the OpenSlide level best suited to its
+downsample.  On a slide with a power-of-2 pyramid, a tile decodes at
+most about four times its own pixel area and is resized at most once, by
+a factor below 2.  The tile grid is computed once when the source is
+created.  Tiles are compatible with openslide-python's DeepZoomGenerator.'''
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import io
+import math
+from typing import NamedTuple
+from xml.etree.ElementTree import Element, ElementTree, SubElement
+
+from openslide_bin import bindings
+from openslide_bin.convert import resize_argb
+from openslide_bin.handle import Slide
+from openslide_bin.properties import snapshot
+from openslide_bin.region import Region, read_region
+
+DZI_NAMESPACE = 'http://schemas.microsoft.com/deepzoom/2008'
+
+
+class Tile(NamedTuple):
+    '''A Deep Zoom tile, as premultiplied ARGB pixels.'''
+
+    width: int
+    height: int
+    pixels: bytearray
+
+
+@dataclass(frozen=True)
+class _DZLevel:
+    # OpenSlide level to read from
+    slide_level: int
+    # downsample from the OpenSlide level to this Deep Zoom level
+    l_z_downsample: float
+    # pixel and tile dimensions of this Deep Zoom level
+    width: int
+    height: int
+    cols: int
+    rows: int
+
+
+class DeepZoomSource:
+    '''Generate Deep Zoom tiles of tile_size pixels plus overlap pixels on
+    each interior edge.  If limit_bounds is true, only cover the non-empty
+    region of the slide, if the slide reports one.'''
+
+    def __init__(
+        self,
+        slide: Slide,
+        tile_size: int = 254,
+        overlap: int = 1,
+        limit_bounds: bool = False,
+    ):
+        if tile_size < 1 or overlap < 0:
+            raise ValueError('Invalid tile size or overlap')
+        self.slide = slide
+        self.tile_size = tile_size
+        self.overlap = overlap
+
+        props = snapshot(slide)
+        l_dims = [
+            props.level_dimensions(level) for level in range(props.level_count)
+        ]
+        self._l_downsamples = props.level_downsamples.tolist()
+
+        self._l0_offset = (0, 0)
+        bounds = props.bounds if limit_bounds else None
+        if bounds is not None:
+            l0_w, l0_h = l_dims[0]
+            self._l0_offset = bounds[0], bounds[1]
+            scale = bounds[2] / l0_w, bounds[3] / l0_h
+            l_dims = [
+                (math.ceil(w * scale[0]), math.ceil(h * scale[1]))
+                for w, h in l_dims
+            ]
+        self._l_dimensions = l_dims
+
+        # Deep Zoom levels, smallest first, each half the size of the next
+        z_size = l_dims[0]
+        z_dims = [z_size]
+        while z_size[0] > 1 or z_size[1] > 1:
+            z_size = (
+                max(1, math.ceil(z_size[0] / 2)),
+                max(1, math.ceil(z_size[1] / 2)),
+            )
+            z_dims.append(z_size)
+        z_dims.reverse()
+
+        self._levels = []
+        for z, (z_w, z_h) in enumerate(z_dims):
+            l0_z_downsample = 2.0 ** (len(z_dims) - z - 1)
+            slide_level: int = (
+                bindings.openslide_get_best_level_for_downsample(
+                    slide, l0_z_downsample
+                )
+            )
+            self._levels.append(
+                _DZLevel(
+                    slide_level=slide_level,
+                    l_z_downsample=(
+                        l0_z_downsample / self._l_downsamples[slide_level]
+                    ),
+                    width=z_w,
+                    height=z_h,
+                    cols=math.ceil(z_w / tile_size),
+                    rows=math.ceil(z_h / tile_size),
+                )
+            )
+        slide.check()
+
+    @property
+    def level_count(self) -> int:
+        '''The number of Deep Zoom levels.'''
+        return len(self._levels)
+
+    @property
+    def level_dimensions(self) -> list[tuple[int, int]]:
+        '''The pixel dimensions of each Deep Zoom level.'''
+        return [(lvl.width, lvl.height) for lvl in self._levels]
+
+    @property
+    def level_tiles(self) -> list[tuple[int, int]]:
+        '''The number of tile columns and rows in each Deep Zoom level.'''
+        return [(lvl.cols, lvl.rows) for lvl in self._levels]
+
+    @property
+    def tile_count(self) -> int:
+        '''The total number of tiles.'''
+        return sum(lvl.cols * lvl.rows for lvl in self._levels)
+
+    def tile_region(
+        self, level: int, col: int, row: int
+    ) -> tuple[Region, tuple[int, int]]:
+        '''Return the OpenSlide region to read for a tile, and the tile's
+        final dimensions.'''
+        if not 0 <= level < len(self._levels):
+            raise ValueError(f'Invalid level {level}')
+        lvl = self._levels[level]
+        if not (0 <= col < lvl.cols and 0 <= row < lvl.rows):
+            raise ValueError(f'Invalid tile address {(col, row)}')
+        l_w, l_h = self._l_dimensions[lvl.slide_level]
+        l0_downsample = self._l_downsamples[lvl.slide_level]
+        location = []
+        l_size = []
+        z_size = []
+        for t, t_lim, z_lim, l_lim, l0_off in (
+            (col, lvl.cols, lvl.width, l_w, self._l0_offset[0]),
+            (row, lvl.rows, lvl.height, l_h, self._l0_offset[1]),
+        ):
+            # overlap only on edges shared with another tile
+            overlap_tl = self.overlap * int(t != 0)
+            overlap_br = self.overlap * int(t != t_lim - 1)
+            z_loc = self.tile_size * t
+            z = min(self.tile_size, z_lim - z_loc) + overlap_tl + overlap_br
+            l_loc = lvl.l_z_downsample * (z_loc - overlap_tl)
+            location.append(int(l0_downsample * l_loc + l0_off))
+            l_size.append(
+                int(
+                    min(
+                        math.ceil(lvl.l_z_downsample * z),
+                        l_lim - math.ceil(l_loc),
+                    )
+                )
+            )
+            z_size.append(z)
+        region = Region(
+            lvl.slide_level, location[0], location[1], l_size[0], l_size[1]
+        )
+        return region, (z_size[0], z_size[1])
+
+    def get_tile(self, level: int, col: int, row: int) -> Tile:
+        '''Read a tile.'''
+        region, (w, h) = self.tile_region(level, col, row)
+        buf = bytearray(region.nbytes)
+        read_region(self.slide, buf, *region)
+        if (region.w, region.h) != (w, h):
+            buf = resize_argb(buf, region.w, region.h, w, h)
+        return Tile(w, h, buf)
+
+    def get_dzi(self, format: str = 'jpeg') -> str:
+        '''Return the XML descriptor for the Deep Zoom image, with tiles in
+        the specified file format.'''
+        image = Element(
+            'Image',
+            Format=format,
+            Overlap=str(self.overlap),
+            TileSize=str(self.tile_size),
+            xmlns=DZI_NAMESPACE,
+        )
+        width, height = self.level_dimensions[-1]
+        SubElement(image, 'Size', Width=str(width), Height=str(height))
+        buf = io.BytesIO()
+        ElementTree(element=image).write(buf, encoding='UTF-8')
+        return buf.getvalue().decode('UTF-8')
@@ -0,0 +1,163 @@
+#
+# openslide-bin - Wrapper for OpenSlide binary build
+#
+# Copyright (c) 2026 Benjamin Gilbert
+#
+# This library is free software; you can redistribute it and/or modify it
+# under the terms of version 2.1 of the GNU Lesser General Public License
+# as published by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
+# License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+'''Minimal OpenSlide handle management.
+
+OpenSlide handles can't be used in a child process created with fork(),
+since another thread may have held one of their locks at the time.  Slides
+are closed in the child without calling into OpenSlide, and must be
+reopened there.'''
+
+from __future__ import annotations
+
+from ctypes import Array, byref, c_int64, c_uint32
+import os
+from types import TracebackType
+import weakref
+
+from openslide_bin import bindings
+
+
+class OpenSlideError(Exception):
+    '''An error reported by OpenSlide.  Once OpenSlide reports an error,
+    the handle is unusable.'''
+
+
+class Slide:
+    '''An open OpenSlide handle.  A Slide can be passed directly to the
+    functions in openslide_bin.bindings.'''
+
+    def __init__(self, path: str | os.PathLike[str]):
+        self.path = os.fspath(path)
+        self._inherited = False
+        try:
+            # identity of the file when it was opened, so caches don't have
+            # to stat it on every lookup
+            self.stat: os.stat_result | None = os.stat(self.path)
+        except OSError:
+            # the synthetic slide, or let OpenSlide report the error
+            self.stat = None
+        osr: int | None = bindings.openslide_open(os.fsencode(self.path))
+        if osr is None:
+            raise OpenSlideError(
+                f'Unsupported or missing image file: {self.path}'
+            )
+        self._osr: int | None = osr
+        _open_slides.add(self)
+        try:
+            self.check()
+        except OpenSlideError:
+            self.close()
+            raise
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({self.path!r})'
+
+    def __enter__(self) -> Slide:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    @property
+    def _as_parameter_(self) -> int:
+        if self._osr is None:
+            if self._inherited:
+                raise ValueError(
+                    'Slide was opened before fork(); reopen it in the child'
+                )
+            raise ValueError('Slide is closed')
+        return self._osr
+
+    @property
+    def closed(self) -> bool:
+        return self._osr is None
+
+    def check(self) -> None:
+        '''Raise OpenSlideError if the handle is in error state.'''
+        err: bytes | None = bindings.openslide_get_error(self)
+        if err is not None:
+            raise OpenSlideError(err.decode(errors='replace'))
+
+    def properties(self) -> dict[str, str]:
+        '''Return the slide properties.'''
+        names = bindings.openslide_get_property_names(self)
+        props = {}
+        i = 0
+        while names[i] is not None:
+            name: bytes = names[i]
+            value: bytes = bindings.openslide_get_property_value(self, name)
+            props[name.decode(errors='replace')] = value.decode(
+                errors='replace'
+            )
+            i += 1
+        self.check()
+        return props
+
+    def associated_image_names(self) -> list[str]:
+        '''Return the names of the slide's associated images.'''
+        names = bindings.openslide_get_associated_image_names(self)
+        result: list[str] = []
+        while names[len(result)] is not None:
+            result.append(names[len(result)].decode(errors='replace'))
+        self.check()
+        return result
+
+    def read_associated_image(
+        self, name: str
+    ) -> tuple[int, int, Array[c_uint32]]:
+        '''Read an associated image and return its width, height, and
+        premultiplied ARGB pixels.'''
+        w, h = c_int64(), c_int64()
+        bindings.openslide_get_associated_image_dimensions(
+            self, name.encode(), byref(w), byref(h)
+        )
+        self.check()
+        if w.value < 0:
+            raise KeyError(name)
+        buf = (c_uint32 * (w.value * h.value))()
+        bindings.openslide_read_associated_image(self, name.encode(), buf)
+        self.check()
+        return w.value, h.value, buf
+
+    def close(self) -> None:
+        if self._osr is not None:
+            bindings.openslide_close(self._osr)
+            self._osr = None
+            _open_slides.discard(self)
+
+
+# handles to abandon in a fork child
+_open_slides: weakref.WeakSet[Slide] = weakref.WeakSet()
+
+
+def _after_fork_in_child() -> None:
+    for slide in _open_slides:
+        # leak the parent's handle rather than risk deadlocking on its locks
+        slide._osr = None
+        slide._inherited = True
+    _open_slides.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
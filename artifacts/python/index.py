@@ -0,0 +1,496 @@
+#
+# openslide-bin - Wrapper for OpenSlide binary build
+#
+# Copyright (c) 2026 Benjamin Gilbert
+#
+# This library is free software; you can redistribute it and/or modify it
+# under the terms of version 2.1 of the GNU Lesser General Public License
+# as published by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
+# License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+'''Catalog slide metadata in SQLite.
+
+Listing a large slide archive shouldn't require opening every slide.
+Catalog.update() walks a directory tree, probes new and changed files on
+a process pool, and bulk-inserts their dimensions, level count, vendor,
+MPP, and associated image names into an SQLite database.  A file is
+reprobed only when its size or modification time changes, so rescanning
+an unchanged tree costs one stat() per file.  Catalog.slides() then
+filters the catalog with an indexed query.
+
+Files that aren't slides are recorded too, so they aren't reprobed
+either.  Files that OpenSlide recognizes but can't open are recorded with
+their error, as are files whose probe crashes its worker process.  Files
+whose names aren't valid UTF-8 can't be stored, so they're skipped and
+counted as errors.'''
+
+from __future__ import annotations
+
+import argparse
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass
+import itertools
+import json
+import os
+import sqlite3
+from types import TracebackType
+
+from openslide_bin import bindings
+from openslide_bin.handle import OpenSlideError, Slide
+from openslide_bin.properties import snapshot
+
+DEFAULT_DATABASE = '.openslide-index.sqlite'
+# probed files to insert per transaction
+BATCH_SIZE = 256
+# probes in flight per worker process
+PROBES_PER_WORKER = 2
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    vendor TEXT,
+    error TEXT,
+    width INTEGER,
+    height INTEGER,
+    level_count INTEGER,
+    mpp_x REAL,
+    mpp_y REAL
+);
+CREATE INDEX IF NOT EXISTS files_vendor ON files (vendor);
+CREATE TABLE IF NOT EXISTS associated_images (
+    path TEXT NOT NULL REFERENCES files (path) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    PRIMARY KEY (path, name)
+);
+CREATE INDEX IF NOT EXISTS associated_images_name
+    ON associated_images (name);
+'''
+_COLUMNS = (
+    'path',
+    'size',
+    'mtime_ns',
+    'vendor',
+    'error',
+    'width',
+    'height',
+    'level_count',
+    'mpp_x',
+    'mpp_y',
+)
+
+
+@dataclass(frozen=True)
+class SlideRecord:
+    '''Catalog entry for one slide.'''
+
+    # absolute path
+    path: str
+    size: int
+    mtime_ns: int
+    vendor: str
+    # level 0
+    width: int
+    height: int
+    level_count: int
+    mpp_x: float | None
+    mpp_y: float | None
+    associated_images: tuple[str, ...]
+
+
+@dataclass
+class IndexStats:
+    '''Results of one Catalog.update().'''
+
+    # files probed for the first time
+    added: int = 0
+    # files reprobed because they changed
+    changed: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    # probed files that turned out to be slides, and files that couldn't
+    # be opened or cataloged
+    slides: int = 0
+    errors: int = 0
+
+
+@dataclass(frozen=True)
+class _Probe:
+    path: str
+    size: int
+    mtime_ns: int
+    vendor: str | None = None
+    error: str | None = None
+    width: int | None = None
+    height: int | None = None
+    level_count: int | None = None
+    mpp_x: float | None = None
+    mpp_y: float | None = None
+    associated_images: tuple[str, ...] = ()
+
+
+def _probe(path: str, size: int, mtime_ns: int) -> _Probe:
+    '''Read the metadata of one file.  Runs in a worker process.'''
+    vendor: bytes | None = bindings.openslide_detect_vendor(os.fsencode(path))
+    if vendor is None:
+        return _Probe(path, size, mtime_ns)
+    try:
+        with Slide(path) as slide:
+            props = snapshot(slide)
+            width, height = props.level_dimensions(0)
+            mpp_x, mpp_y = props.mpp or (None, None)
+            return _Probe(
+                path,
+                size,
+                mtime_ns,
+                vendor=vendor.decode(),
+                width=width,
+                height=height,
+                level_count=props.level_count,
+                mpp_x=mpp_x,
+                mpp_y=mpp_y,
+                associated_images=tuple(slide.associated_image_names()),
+            )
+    except (OpenSlideError, OSError, ValueError) as e:
+        return _Probe(
+            path, size, mtime_ns, vendor=vendor.decode(), error=str(e)
+        )
+
+
+def _probe_alone(path: str, size: int, mtime_ns: int) -> _Probe:
+    '''Probe one file in a process of its own, recording an error if the
+    process crashes.'''
+    with ProcessPoolExecutor(1) as executor:
+        try:
+            probe: _Probe = executor.submit(
+                _probe, path, size, mtime_ns
+            ).result()
+            return probe
+        except BrokenProcessPool:
+            return _Probe(path, size, mtime_ns, error='Probe process crashed')
+
+
+def _probe_all(
+    todo: Iterable[tuple[str, int, int]], workers: int | None
+) -> Iterator[_Probe]:
+    '''Probe files on a pool of workers processes, yielding the results in
+    order.  A crashing probe breaks the pool and fails every probe in
+    flight, so bound the probes in flight, reprobe them one at a time to
+    find the culprit, and continue on a new pool.'''
+    items = iter(todo)
+    limit = PROBES_PER_WORKER * (workers or os.cpu_count() or 1)
+    while True:
+        in_flight: deque[tuple[tuple[str, int, int], Future[_Probe]]]
+        in_flight = deque()
+        suspects: list[tuple[str, int, int]] = []
+        with ProcessPoolExecutor(workers) as executor:
+            for item in itertools.islice(items, limit):
+                in_flight.append((item, executor.submit(_probe, *item)))
+            while in_flight:
+                item, future = in_flight.popleft()
+                try:
+                    probe = future.result()
+                except BrokenProcessPool:
+                    suspects = [item] + [queued for queued, _ in in_flight]
+                    break
+                following = next(items, None)
+                if following is not None:
+                    in_flight.append(
+                        (following, executor.submit(_probe, *following))
+                    )
+                yield probe
+        if not suspects:
+            return
+        for item in suspects:
+            yield _probe_alone(*item)
+
+
+def _subtree_bounds(root: str) -> tuple[str, str]:
+    '''Return the exclusive bounds of the range of paths under the absolute
+    path root.'''
+    # the range covers exactly the paths starting with the prefix, which
+    # already ends with a separator if root is a filesystem root
+    prefix = root if root.endswith(os.sep) else root + os.sep
+    return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+
+class Catalog:
+    '''An SQLite catalog of slide metadata.'''
+
+    def __init__(self, path: str | os.PathLike[str]):
+        self.path = os.path.abspath(path)
+        # the database and its journals
+        self._own_paths = frozenset(
+            self.path + suffix for suffix in ('', '-wal', '-shm', '-journal')
+        )
+        self._db = sqlite3.connect(self.path)
+        self._db.execute('PRAGMA foreign_keys = ON')
+        # let readers query while an update is running
+        self._db.execute('PRAGMA journal_mode = WAL')
+        self._db.execute('PRAGMA synchronous = NORMAL')
+        with self._db:
+            self._db.executescript(_SCHEMA)
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({self.path!r})'
+
+    def __enter__(self) -> Catalog:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __len__(self) -> int:
+        '''Return the number of readable slides in the catalog.'''
+        count: int = self._db.execute(
+            'SELECT count(*) FROM files '
+            + 'WHERE vendor IS NOT NULL AND error IS NULL'
+        ).fetchone()[0]
+        return count
+
+    def _walk(self, root: str) -> Iterator[tuple[str, int, int]]:
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for name in sorted(filenames):
+                path = os.path.join(dirpath, name)
+                if path in self._own_paths:
+                    continue
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield path, st.st_size, st.st_mtime_ns
+
+    def update(
+        self, root: str | os.PathLike[str], workers: int | None = None
+    ) -> IndexStats:
+        '''Bring the catalog up to date with the files under root, probing
+        new and changed files on a pool of workers processes.'''
+        root = os.path.abspath(root)
+        stats = IndexStats()
+        bounds = _subtree_bounds(root)
+        known = {
+            path: (size, mtime_ns)
+            for path, size, mtime_ns in self._db.execute(
+                'SELECT path, size, mtime_ns FROM files '
+                + 'WHERE path > ? AND path < ?',
+                bounds,
+            )
+        }
+        todo = []
+        for path, size, mtime_ns in self._walk(root):
+            try:
+                path.encode()
+            except UnicodeEncodeError:
+                # undecodable filename; SQLite text must be valid UTF-8
+                stats.errors += 1
+                continue
+            old = known.pop(path, None)
+            if old == (size, mtime_ns):
+                stats.unchanged += 1
+                continue
+            if old is None:
+                stats.added += 1
+            else:
+                stats.changed += 1
+            todo.append((path, size, mtime_ns))
+        with self._db:
+            self._db.executemany(
+                'DELETE FROM files WHERE path = ?', ((p,) for p in known)
+            )
+        stats.removed = len(known)
+
+        batch = []
+        for probe in _probe_all(todo, workers):
+            if probe.error is not None:
+                stats.errors += 1
+            elif probe.vendor is not None:
+                stats.slides += 1
+            batch.append(probe)
+            if len(batch) >= BATCH_SIZE:
+                self._insert(batch)
+                batch = []
+        self._insert(batch)
+        return stats
+
+    def _insert(self, probes: Iterable[_Probe]) -> None:
+        probes = list(probes)
+        with self._db:
+            self._db.executemany(
+                'DELETE FROM associated_images WHERE path = ?',
+                ((p.path,) for p in probes),
+            )
+            self._db.executemany(
+                f'INSERT OR REPLACE INTO files ({", ".join(_COLUMNS)}) '
+                + f'VALUES ({", ".join("?" * len(_COLUMNS))})',
+                (tuple(getattr(p, c) for c in _COLUMNS) for p in probes),
+            )
+            self._db.executemany(
+                'INSERT INTO associated_images (path, name) VALUES (?, ?)',
+                (
+                    (p.path, name)
+                    for p in probes
+                    for name in p.associated_images
+                ),
+            )
+
+    def slides(
+        self,
+        root: str | os.PathLike[str] | None = None,
+        vendor: str | None = None,
+        associated_image: str | None = None,
+        min_width: int | None = None,
+        min_height: int | None = None,
+        max_mpp: float | None = None,
+    ) -> Iterator[SlideRecord]:
+        '''Yield the readable slides in the catalog, ordered by path,
+        optionally only those under root, from vendor, with the named
+        associated image, at least min_width x min_height, or with an MPP
+        of at most max_mpp in both dimensions.'''
+        where = ['vendor IS NOT NULL', 'error IS NULL']
+        params: list[str | int | float] = []
+        if root is not None:
+            root = os.path.abspath(root)
+            where.append('path > ? AND path < ?')
+            params += _subtree_bounds(root)
+        if vendor is not None:
+            where.append('vendor = ?')
+            params.append(vendor)
+        if associated_image is not None:
+            where.append(
+                'path IN (SELECT path FROM associated_images WHERE name = ?)'
+            )
+            params.append(associated_image)
+        if min_width is not None:
+            where.append('width >= ?')
+            params.append(min_width)
+        if min_height is not None:
+            where.append('height >= ?')
+            params.append(min_height)
+        if max_mpp is not None:
+            where.append('mpp_x <= ? AND mpp_y <= ?')
+            params += [max_mpp, max_mpp]
+        return self._query(' AND '.join(where), params)
+
+    def get(self, path: str | os.PathLike[str]) -> SlideRecord | None:
+        '''Return the catalog entry for a slide, or None if it isn't a
+        cataloged, readable slide.'''
+        return next(
+            self._query(
+                'path = ? AND vendor IS NOT NULL AND error IS NULL',
+                [os.path.abspath(path)],
+            ),
+            None,
+        )
+
+    def _query(
+        self, where: str, params: list[str | int | float]
+    ) -> Iterator[SlideRecord]:
+        cursor = self._db.execute(
+            'SELECT path, size, mtime_ns, vendor, width, height, '
+            + 'level_count, mpp_x, mpp_y, '
+            + '(SELECT group_concat(name, char(0)) FROM ('
+            + 'SELECT name FROM associated_images a '
+            + 'WHERE a.path = files.path ORDER BY name)) '
+            + f'FROM files WHERE {where} ORDER BY path',
+            params,
+        )
+        for row in cursor:
+            names = row[-1]
+            yield SlideRecord(
+                path=row[0],
+                size=row[1],
+                mtime_ns=row[2],
+                vendor=row[3],
+                width=row[4],
+                height=row[5],
+                level_count=row[6],
+                mpp_x=row[7],
+                mpp_y=row[8],
+                associated_images=(tuple(names.split('\0')) if names else ()),
+            )
+
+    def errors(self) -> Iterator[tuple[str, str]]:
+        '''Yield (path, error) for recognized slides that couldn't be
+        opened.'''
+        cursor = self._db.execute(
+            'SELECT path, error FROM files WHERE error IS NOT NULL '
+            + 'ORDER BY path'
+        )
+        yield from cursor
+
+
+class _Args(argparse.Namespace):
+    root: str
+    database: str | None
+    workers: int | None
+    list: bool
+    vendor: str | None
+    associated_image: str | None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog='python -m openslide_bin.index',
+        description='Catalog the slides in a directory tree.',
+    )
+    parser.add_argument('root', help='slide directory')
+    parser.add_argument(
+        '-d',
+        '--database',
+        help=f'catalog file (default: ROOT/{DEFAULT_DATABASE})',
+    )
+    parser.add_argument(
+        '-w', '--workers', type=int, help='number of worker processes'
+    )
+    parser.add_argument(
+        '-l',
+        '--list',
+        action='store_true',
+        help='print matching slides as JSON lines after updating',
+    )
+    parser.add_argument('-V', '--vendor', help='only list slides from VENDOR')
+    parser.add_argument(
+        '-a',
+        '--associated-image',
+        metavar='NAME',
+        help='only list slides with associated image NAME',
+    )
+    args = parser.parse_args(namespace=_Args())
+
+    database = args.database or os.path.join(args.root, DEFAULT_DATABASE)
+    with Catalog(database) as catalog:
+        stats = catalog.update(args.root, args.workers)
+        if args.list:
+            for record in catalog.slides(
+                args.root,
+                vendor=args.vendor,
+                associated_image=args.associated_image,
+            ):
+                print(json.dumps(asdict(record)))
+        else:
+            print(json.dumps(asdict(stats), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,309 @@
+#
+# openslide-bin - Wrapper for OpenSlide binary build
+#
+# Copyright (c) 2026 Benjamin Gilbert
+#
+# This library is free software; you can redistribute it and/or modify it
+# under the terms of version 2.1 of the GNU Lesser General Public License
+# as published by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
+# License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+'''Decode a slide level once into a memory-mappable .npy file.
+
+Training loops that sample random patches pay for a decode on every read.
+dump_level() decodes a whole level in parallel tiles and writes the pixels
+as a height x width x channels uint8 array in NumPy's .npy format, which
+can then be opened with numpy.load(path, mmap_mode='r') at no decode cost.
+NumPy isn't needed to write the file.
+
+Tiles are written directly into a memory map of the output.  A JSON
+sidecar next to it records the level geometry and how many rows are
+complete, and is updated as each band of tiles finishes, so an
+interrupted dump resumes where it left off.  RGB output is composited
+onto the slide's background color.'''
+
+from __future__ import annotations
+
+import argparse
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from ctypes import byref, c_int64
+import json
+import mmap
+import os
+import struct
+from typing import Any
+
+from openslide_bin import bindings
+from openslide_bin.convert import argb_to_rgb, argb_to_rgba
+from openslide_bin.handle import Slide
+from openslide_bin.properties import snapshot
+from openslide_bin.region import read_region
+
+CHANNELS = {'rgba': 4, 'rgb': 3}
+SIDECAR_SUFFIX = '.json'
+
+_NPY_MAGIC = b'\x93NUMPY\x01\x00'
+# the .npy format aligns the start of the data to this many bytes
+_NPY_ALIGN = 64
+
+
+def _npy_header(shape: tuple[int, ...]) -> bytes:
+    '''Return a version 1.0 .npy header for a C-order uint8 array.'''
+    header = (
+        f"{{'descr': '|u1', 'fortran_order': False, 'shape': {shape!r}, }}"
+    )
+    # pad with spaces and a newline so the data is aligned
+    length = len(_NPY_MAGIC) + 2 + len(header) + 1
+    header += ' ' * (-length % _NPY_ALIGN) + '\n'
+    return _NPY_MAGIC + struct.pack('<H', len(header)) + header.encode()
+
+
+def _slide_identity(path: str) -> dict[str, int | None]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return {'slide_size': None, 'slide_mtime_ns': None}
+    return {'slide_size': st.st_size, 'slide_mtime_ns': st.st_mtime_ns}
+
+
+def read_sidecar(path: str | os.PathLike[str]) -> dict[str, Any] | None:
+    '''Return the sidecar metadata of a .npy dump, or None if it has none.'''
+    try:
+        with open(os.fspath(path) + SIDECAR_SUFFIX) as f:
+            meta: dict[str, Any] = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta
+
+
+def _write_sidecar(path: str, meta: dict[str, Any]) -> None:
+    '''Atomically replace the sidecar.'''
+    sidecar = path + SIDECAR_SUFFIX
+    tmp = sidecar + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(meta, f, indent=2)
+        f.write('\n')
+    os.replace(tmp, sidecar)
+
+
+def _dump_tile(
+    slide: Slide,
+    mm: mmap.mmap,
+    meta: dict[str, Any],
+    background: tuple[int, int, int],
+    x: int,
+    y: int,
+    w: int,
+    h: int,
+) -> None:
+    '''Read one tile and copy it into the map.  Runs on a worker thread.'''
+    downsample = meta['downsample']
+    pixels = bytearray(w * h * 4)
+    read_region(
+        slide,
+        pixels,
+        meta['level'],
+        int(x * downsample),
+        int(y * downsample),
+        w,
+        h,
+    )
+    channels = CHANNELS[meta['channels']]
+    if channels == 3:
+        out = memoryview(argb_to_rgb(pixels, background=background))
+    else:
+        out = memoryview(argb_to_rgba(pixels, pixels))
+    span = w * channels
+    stride = meta['width'] * channels
+    start = meta['offset'] + y * stride + x * channels
+    for i in range(h):
+        mm[start : start + span] = out[i * span : (i + 1) * span]
+        start += stride
+
+
+def dump_level(
+    slide: Slide,
+    path: str | os.PathLike[str],
+    level: int = 0,
+    channels: str = 'rgba',
+    tile_size: int = 512,
+    workers: int | None = None,
+    resume: bool = True,
+) -> dict[str, Any]:
+    '''Decode a level of the slide into a .npy file at path, with
+    channels 'rgba' or 'rgb', and return the sidecar metadata.  If resume
+    is true and an interrupted dump of the same level is at path, finish
+    it; otherwise start over.'''
+    if channels not in CHANNELS:
+        raise ValueError(f'Unknown channels: {channels}')
+    if tile_size < 1:
+        raise ValueError('Invalid tile size')
+    path = os.fspath(path)
+    workers = workers or os.cpu_count() or 1
+    w, h = c_int64(), c_int64()
+    bindings.openslide_get_level_dimensions(slide, level, byref(w), byref(h))
+    downsample = float(bindings.openslide_get_level_downsample(slide, level))
+    slide.check()
+    if w.value < 0:
+        raise ValueError(f'Invalid level {level}')
+    width, height = w.value, h.value
+
+    shape = (height, width, CHANNELS[channels])
+    header = _npy_header(shape)
+    size = len(header) + height * width * CHANNELS[channels]
+    meta: dict[str, Any] = {
+        'slide': slide.path,
+        **_slide_identity(slide.path),
+        'level': level,
+        'downsample': downsample,
+        'width': width,
+        'height': height,
+        'channels': channels,
+        'dtype': 'uint8',
+        'shape': list(shape),
+        'offset': len(header),
+        'tile_size': tile_size,
+        'rows_complete': 0,
+        'complete': False,
+    }
+
+    old = read_sidecar(path) if resume else None
+    if (
+        old is not None
+        and {**old, 'rows_complete': 0, 'complete': False} == meta
+        and os.path.exists(path)
+        and os.path.getsize(path) == size
+    ):
+        meta = old
+        if meta['complete']:
+            return meta
+    else:
+        # drop any stale sidecar first, so a crash can't pair it with the
+        # new file
+        try:
+            os.unlink(path + SIDECAR_SUFFIX)
+        except FileNotFoundError:
+            pass
+        with open(path, 'wb') as new:
+            new.write(header)
+            new.truncate(size)
+        _write_sidecar(path, meta)
+
+    background = snapshot(slide).background_color
+    with (
+        open(path, 'r+b') as f,
+        mmap.mmap(f.fileno(), 0) as mm,
+        ThreadPoolExecutor(
+            workers, thread_name_prefix='openslide-npy'
+        ) as executor,
+    ):
+        # tile futures in order, each with the row count completed when it
+        # finishes if it's the last tile of its band
+        pending: deque[tuple[Future[None], int | None]] = deque()
+
+        def retire() -> None:
+            future, rows_complete = pending.popleft()
+            future.result()
+            if rows_complete is not None:
+                mm.flush()
+                meta['rows_complete'] = rows_complete
+                _write_sidecar(path, meta)
+
+        try:
+            for y in range(meta['rows_complete'], height, tile_size):
+                th = min(tile_size, height - y)
+                columns = range(0, width, tile_size)
+                for x in columns:
+                    if len(pending) >= 2 * workers:
+                        retire()
+                    pending.append(
+                        (
+                            executor.submit(
+                                _dump_tile,
+                                slide,
+                                mm,
+                                meta,
+                                background,
+                                x,
+                                y,
+                                min(tile_size, width - x),
+                                th,
+                            ),
+                            y + th if x == columns[-1] else None,
+                        )
+                    )
+            while pending:
+                retire()
+        finally:
+            for future, _ in pending:
+                future.cancel()
+    meta['rows_complete'] = height
+    meta['complete'] = True
+    _write_sidecar(path, meta)
+    return meta
+
+
+class _Args(argparse.Namespace):
+    slide: str
+    output: str
+    level: int
+    channels: str
+    tile_size: int
+    workers: int | None
+    restart: bool
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog='python -m openslide_bin.npy',
+        description='Decode a slide level into a memory-mappable .npy file.',
+    )
+    parser.add_argument('slide', help='slide file')
+    parser.add_argument('output', help='output .npy file')
+    parser.add_argument(
+        '-l', '--level', type=int, default=0, help='level to decode'
+    )
+    parser.add_argument(
+        '-c',
+        '--channels',
+        choices=tuple(CHANNELS),
+        default='rgba',
+        help='output channels',
+    )
+    parser.add_argument(
+        '-s', '--tile-size', type=int, default=512, help='tile size'
+    )
+    parser.add_argument(
+        '-w', '--workers', type=int, help='maximum concurrent tile decodes'
+    )
+    parser.add_argument(
+        '-r',
+        '--restart',
+        action='store_true',
+        help='start over instead of resuming an interrupted dump',
+    )
+    args = parser.parse_args(namespace=_Args())
+
+    with Slide(args.slide) as slide:
+        dump_level(
+            slide,
+            args.output,
+            level=args.level,
+            channels=args.channels,
+            tile_size=args.tile_size,
+            workers=args.workers,
+            resume=not args.restart,
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,301 @@
+#
+# openslide-bin - Wrapper for OpenSlide binary build
+#
+# Copyright (c) 2026 Benjamin Gilbert
+#
+# This library is free software; you can redistribute it and/or modify it
+# under the terms of version 2.1 of the GNU Lesser General Public License
+# as published by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
+# License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+'''Coalesce many small region reads into fewer large ones.
+
+Each read_region() call has fixed overhead, and decodes every native tile
+it touches, so many small adjacent reads decode the same tiles over and
+over.  The planner merges requests on the same level whose native tiles
+overlap or touch, reads the bounding box of each group once, aligned to
+tile boundaries, and hands back each request as a view into the larger
+read.  A merge is refused if the merged read would decode more tiles than
+the requests would separately, so distant requests are never combined.
+
+Requests are only merged when their level coordinates are exact integers,
+so a merged read returns the same pixels as individual reads would.'''
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from openslide_bin.handle import Slide
+from openslide_bin.properties import snapshot
+from openslide_bin.region import PIXEL_SIZE, Region, read_region
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# native tile size to assume if the slide doesn't report one
+DEFAULT_TILE_SIZE = 256
+# maximum merged read, in native tiles per side
+DEFAULT_CHUNK_TILES = 8
+
+
+class Patch:
+    '''A requested region within a larger read.  Accessing it doesn't copy
+    the pixels.'''
+
+    def __init__(
+        self, buf: bytearray, stride: int, col: int, row: int, w: int, h: int
+    ):
+        self._buf = buf
+        # bytes per row of the enclosing read
+        self._stride = stride
+        self._offset = row * stride + col * PIXEL_SIZE
+        self.w = w
+        self.h = h
+
+    def rows(self) -> Iterator[memoryview]:
+        '''Yield a view of each row of premultiplied ARGB pixels.'''
+        view = memoryview(self._buf)
+        row_bytes = self.w * PIXEL_SIZE
+        for i in range(self.h):
+            start = self._offset + i * self._stride
+            yield view[start : start + row_bytes]
+
+    def tobytes(self) -> bytes:
+        '''Return a contiguous copy of the pixels.'''
+        return b''.join(self.rows())
+
+    def array(self) -> np.ndarray:
+        '''Return a strided h x w NumPy uint32 array viewing the pixels.
+        Requires NumPy.'''
+        import numpy as np
+
+        return np.ndarray(
+            (self.h, self.w),
+            dtype=np.uint32,
+            buffer=self._buf,
+            offset=self._offset,
+            strides=(self._stride, PIXEL_SIZE),
+        )
+
+
+@dataclass
+class PlanStats:
+    # requested regions
+    requests: int = 0
+    # read_region() calls needed to satisfy them
+    reads: int = 0
+    # native tiles decoded by reading each request separately, ignoring
+    # the OpenSlide cache
+    request_tiles: int = 0
+    # native tiles decoded by the planned reads
+    read_tiles: int = 0
+
+
+@dataclass
+class ReadPlan:
+    reads: list[Region] = field(default_factory=list)
+    # for each request: index into reads, and pixel column and row within
+    # that read
+    placements: list[tuple[int, int, int]] = field(default_factory=list)
+    requests: list[Region] = field(default_factory=list)
+    stats: PlanStats = field(default_factory=PlanStats)
+
+    def execute(self, slide: Slide) -> list[Patch]:
+        '''Perform the reads and return a Patch for each request, in
+        request order.'''
+        bufs = []
+        for read in self.reads:
+            buf = bytearray(read.nbytes)
+            read_region(slide, buf, *read)
+            bufs.append(buf)
+        return [
+            Patch(bufs[i], self.reads[i].w * PIXEL_SIZE, col, row, r.w, r.h)
+            for r, (i, col, row) in zip(self.requests, self.placements)
+        ]
+
+
+@dataclass
+class _Level:
+    downsample: float
+    width: int
+    height: int
+    tile_width: int
+    tile_height: int
+
+    def exact(self, r: Region) -> tuple[int, int] | None:
+        '''Return the request's level coordinates, if they're integers.'''
+        ds = self.downsample
+        if ds != int(ds) or r.x % ds or r.y % ds:
+            return None
+        return r.x // int(ds), r.y // int(ds)
+
+    def tiles(self, x: int, y: int, w: int, h: int) -> int:
+        '''Count the native tiles touched by a rectangle in level
+        coordinates.'''
+        if w <= 0 or h <= 0:
+            return 0
+        cols = (x + w - 1) // self.tile_width - x // self.tile_width + 1
+        rows = (y + h - 1) // self.tile_height - y // self.tile_height + 1
+        return cols * rows
+
+
+def _levels(slide: Slide) -> list[_Level]:
+    props = snapshot(slide)
+    return [
+        _Level(
+            downsample=props.level_downsamples[i],
+            width=props.level_widths[i],
+            height=props.level_heights[i],
+            tile_width=props.tile_widths[i] or DEFAULT_TILE_SIZE,
+            tile_height=props.tile_heights[i] or DEFAULT_TILE_SIZE,
+        )
+        for i in range(props.level_count)
+    ]
+
+
+def _tiles(levels: list[_Level], r: Region) -> int:
+    '''Count the native tiles touched by a request.'''
+    if not 0 <= r.level < len(levels):
+        return 0
+    lvl: _Level = levels[r.level]
+    return lvl.tiles(
+        int(r.x // lvl.downsample), int(r.y // lvl.downsample), r.w, r.h
+    )
+
+
+@dataclass
+class _Group:
+    level: int
+    # level coordinates of the bounding box of the members
+    x0: int
+    y0: int
+    x1: int
+    y1: int
+    # request indices
+    members: list[int]
+    # native tiles decoded by reading the members separately
+    tiles: int
+
+
+def _find(parent: list[int], i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def plan_reads(
+    slide: Slide,
+    regions: Iterable[tuple[int, int, int, int, int]],
+    chunk_tiles: int = DEFAULT_CHUNK_TILES,
+) -> ReadPlan:
+    '''Plan reads for (level, x, y, w, h) regions, merging requests whose
+    native tiles overlap or touch, as long as the merged read spans at most
+    chunk_tiles x chunk_tiles native tiles and decodes no more tiles than
+    the requests would separately.'''
+    levels = _levels(slide)
+    plan = ReadPlan(requests=[Region(*r) for r in regions])
+    # union-find over requests; each root has a group
+    parent = list(range(len(plan.requests)))
+    groups: dict[int, _Group] = {}
+    # (level, tile col, tile row) -> requests touching that tile
+    grid: dict[tuple[int, int, int], list[int]] = {}
+    for i, r in enumerate(plan.requests):
+        lvl = levels[r.level] if 0 <= r.level < len(levels) else None
+        coords = lvl.exact(r) if lvl else None
+        group = groups[i] = _Group(
+            r.level, 0, 0, r.w, r.h, [i], _tiles(levels, r)
+        )
+        if lvl is None or coords is None:
+            # read it alone
+            continue
+        x, y = coords
+        group.x0, group.y0, group.x1, group.y1 = x, y, x + r.w, y + r.h
+        tw, th = lvl.tile_width, lvl.tile_height
+        tx0, ty0 = x // tw, y // th
+        tx1, ty1 = (x + r.w - 1) // tw, (y + r.h - 1) // th
+        if tx1 - tx0 >= chunk_tiles or ty1 - ty0 >= chunk_tiles:
+            # too large to merge with anything
+            continue
+
+        # merge with the groups of requests on this or adjacent tiles
+        for ty in range(ty0 - 1, ty1 + 2):
+            for tx in range(tx0 - 1, tx1 + 2):
+                for j in grid.get((r.level, tx, ty), ()):
+                    a, b = _find(parent, i), _find(parent, j)
+                    if a == b:
+                        continue
+                    ga, gb = groups[a], groups[b]
+                    x0, y0 = min(ga.x0, gb.x0), min(ga.y0, gb.y0)
+                    x1, y1 = max(ga.x1, gb.x1), max(ga.y1, gb.y1)
+                    if (
+                        (x1 - 1) // tw - x0 // tw >= chunk_tiles
+                        or (y1 - 1) // th - y0 // th >= chunk_tiles
+                        or lvl.tiles(x0, y0, x1 - x0, y1 - y0)
+                        > ga.tiles + gb.tiles
+                    ):
+                        continue
+                    parent[b] = a
+                    ga.x0, ga.y0, ga.x1, ga.y1 = x0, y0, x1, y1
+                    ga.members += gb.members
+                    ga.tiles += gb.tiles
+                    del groups[b]
+        for ty in range(ty0, ty1 + 1):
+            for tx in range(tx0, tx1 + 1):
+                grid.setdefault((r.level, tx, ty), []).append(i)
+
+    plan.placements = [(0, 0, 0)] * len(plan.requests)
+    for group in groups.values():
+        if len(group.members) == 1:
+            # nothing to merge; read exactly what was asked for
+            i = group.members[0]
+            plan.placements[i] = (len(plan.reads), 0, 0)
+            plan.reads.append(plan.requests[i])
+            plan.stats.read_tiles += group.tiles
+            continue
+        lvl = levels[group.level]
+        # bounding box, aligned to the tile grid but not extending past the
+        # level unless a request does
+        tw, th = lvl.tile_width, lvl.tile_height
+        x0 = max(group.x0 // tw * tw, min(group.x0, 0))
+        y0 = max(group.y0 // th * th, min(group.y0, 0))
+        x1 = min(-(-group.x1 // tw) * tw, max(group.x1, lvl.width))
+        y1 = min(-(-group.y1 // th) * th, max(group.y1, lvl.height))
+        ds = int(lvl.downsample)
+        for i in group.members:
+            r = plan.requests[i]
+            plan.placements[i] = (
+                len(plan.reads),
+                r.x // ds - x0,
+                r.y // ds - y0,
+            )
+        plan.reads.append(
+            Region(group.level, x0 * ds, y0 * ds, x1 - x0, y1 - y0)
+        )
+        plan.stats.read_tiles += lvl.tiles(x0, y0, x1 - x0, y1 - y0)
+
+    plan.stats.requests = len(plan.requests)
+    plan.stats.reads = len(plan.reads)
+    plan.stats.request_tiles = sum(_tiles(levels, r) for r in plan.requests)
+    return plan
+
+
+def read_coalesced(
+    slide: Slide,
+    regions: Iterable[tuple[int, int, int, int, int]],
+    chunk_tiles: int = DEFAULT_CHUNK_TILES,
+) -> tuple[list[Patch], PlanStats]:
+    '''Read (level, x, y, w, h) regions with coalesced reads.  Return a
+    Patch for each region, in order, and statistics on the reads saved.'''
+    plan = plan_reads(slide, regions, chunk_tiles)
+    return plan.execute(slide), plan.stats
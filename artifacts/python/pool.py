@@ -0,0 +1,322 @@
+#
+# openslide-bin - Wrapper for OpenSlide binary build
+#
+# Copyright (c) 2026 Benjamin Gilbert
+#
+# This library is free software; you can redistribute it and/or modify it
+# under the terms of version 2.1 of the GNU Lesser General Public License
+# as published by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
+# License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+'''A process-local pool of open slide handles.
+
+Opening a slide can be expensive, since some formats parse large index
+structures.  A SlidePool keeps recently used handles open and hands them
+out again for later requests for the same file.  Handles are keyed by path
+and file identity, so a file that's replaced or modified gets a new
+handle.  A background thread closes handles that have been idle too long,
+even if the pool isn't used again.  A pool inherited by a fork() child
+starts out empty there.'''
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+import os
+import threading
+import time
+from types import TracebackType
+import weakref
+
+from openslide_bin import bindings
+from openslide_bin.cache import Cache
+from openslide_bin.handle import OpenSlideError, Slide
+
+# path, device, inode, mtime
+_Key = tuple[str, int, int, int]
+
+
+@dataclass
+class PoolStats:
+    # requests served by an open handle
+    hits: int = 0
+    # requests that opened a handle
+    misses: int = 0
+    # handles closed because the pool was full or they were idle too long
+    evictions: int = 0
+    # handles currently open
+    handles: int = 0
+
+
+class _Entry:
+    def __init__(self, key: _Key):
+        self.key = key
+        self.slide: Slide | None = None
+        self.error: BaseException | None = None
+        self.refs = 0
+        self.last_used = time.monotonic()
+        # set once the slide has been opened or failed to open
+        self.ready = threading.Event()
+
+
+class SlidePool:
+    '''Keep up to max_handles slides open, closing the least recently used
+    ones first, and closing any that have been idle for idle_ttl seconds,
+    checking for them at least every idle_ttl / 2 seconds.
+    Handles that are checked out are never closed; if all handles are in
+    use, the pool temporarily exceeds max_handles.  If cache is specified,
+    attach it to every handle.  If on_close is specified, call it with the
+    identity and handle of each slide just before closing it, with the pool
+    lock held; it must not call back into the pool.'''
+
+    def __init__(
+        self,
+        max_handles: int = 64,
+        idle_ttl: float | None = 300,
+        cache: Cache | None = None,
+        on_close: Callable[[_Key, Slide], None] | None = None,
+    ):
+        if max_handles < 1:
+            raise ValueError('max_handles must be positive')
+        self.max_handles = max_handles
+        self.idle_ttl = idle_ttl
+        self.cache = cache
+        self.on_close = on_close
+        self._lock = threading.Lock()
+        # least recently used first
+        self._entries: OrderedDict[_Key, _Entry] = OrderedDict()
+        self._by_slide: dict[int, _Entry] = {}
+        self._stats = PoolStats()
+        _pools.add(self)
+
+    def __enter__(self) -> SlidePool:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    @property
+    def stats(self) -> PoolStats:
+        '''Return a snapshot of the pool counters.'''
+        with self._lock:
+            return PoolStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+                handles=len(self._entries),
+            )
+
+    @staticmethod
+    def _key(path: str) -> _Key:
+        try:
+            st = os.stat(path)
+        except OSError:
+            # let Slide report the error, or handle a special path such as
+            # the synthetic slide
+            return (path, 0, 0, 0)
+        return (os.path.abspath(path), st.st_dev, st.st_ino, st.st_mtime_ns)
+
+    def acquire(self, path: str | os.PathLike[str]) -> Slide:
+        '''Check out a handle for path, opening it if necessary.  The caller
+        must not close it, and must return it with release().'''
+        path = os.fspath(path)
+        key = self._key(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._stats.hits += 1
+                self._entries.move_to_end(key)
+                opener = False
+            else:
+                self._stats.misses += 1
+                entry = self._entries[key] = _Entry(key)
+                opener = True
+            entry.refs += 1
+            self._prune()
+        if opener and self.idle_ttl is not None:
+            _start_reaper()
+
+        if opener:
+            # open outside the lock, so other slides aren't blocked; later
+            # requests for this one wait on the event
+            try:
+                slide = Slide(path)
+                if self.cache is not None:
+                    try:
+                        self.cache.attach(slide)
+                    except BaseException:
+                        slide.close()
+                        raise
+                with self._lock:
+                    entry.slide = slide
+                    self._by_slide[id(slide)] = entry
+            except BaseException as e:
+                entry.error = e
+                with self._lock:
+                    self._entries.pop(key, None)
+                raise
+            finally:
+                entry.ready.set()
+            return slide
+
+        entry.ready.wait()
+        if entry.slide is None:
+            with self._lock:
+                entry.refs -= 1
+            raise OpenSlideError(f"Couldn't open {path}") from entry.error
+        return entry.slide
+
+    def identity(self, slide: Slide) -> _Key:
+        '''Return the (path, device, inode, mtime) identity of a checked-out
+        handle.  A modified or replaced file gets a new identity.'''
+        with self._lock:
+            entry = self._by_slide.get(id(slide))
+            if entry is None or entry.refs < 1:
+                raise ValueError(f'{slide!r} is not checked out')
+            return entry.key
+
+    def release(self, slide: Slide) -> None:
+        '''Return a handle checked out with acquire().'''
+        with self._lock:
+            entry = self._by_slide.get(id(slide))
+            if entry is None or entry.refs < 1:
+                raise ValueError(f'{slide!r} is not checked out')
+            entry.refs -= 1
+            entry.last_used = time.monotonic()
+            if bindings.openslide_get_error(slide) is not None:
+                # an OpenSlide error is permanent; don't hand it out again
+                if self._entries.get(entry.key) is entry:
+                    del self._entries[entry.key]
+            self._prune()
+            if entry.refs == 0 and self._entries.get(entry.key) is not entry:
+                self._close(entry)
+
+    @contextmanager
+    def checkout(self, path: str | os.PathLike[str]) -> Iterator[Slide]:
+        '''Context manager for acquire() and release().'''
+        slide = self.acquire(path)
+        try:
+            yield slide
+        finally:
+            self.release(slide)
+
+    def prune(self) -> None:
+        '''Close handles that have been idle longer than idle_ttl.'''
+        with self._lock:
+            self._prune()
+
+    def close(self) -> None:
+        '''Close all idle handles.  Handles that are checked out are closed
+        when they're released.'''
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry.refs == 0 and entry.ready.is_set():
+                    del self._entries[key]
+                    self._close(entry)
+            # orphan the rest
+            self._entries.clear()
+
+    def _prune(self) -> None:
+        # caller holds the lock
+        now = time.monotonic()
+        excess = len(self._entries) - self.max_handles
+        for key, entry in list(self._entries.items()):
+            if entry.refs > 0 or not entry.ready.is_set():
+                continue
+            if excess > 0 or (
+                self.idle_ttl is not None
+                and now - entry.last_used > self.idle_ttl
+            ):
+                del self._entries[key]
+                self._close(entry)
+                self._stats.evictions += 1
+                excess -= 1
+
+    def _close(self, entry: _Entry) -> None:
+        # caller holds the lock
+        if entry.slide is not None:
+            self._by_slide.pop(id(entry.slide), None)
+            if self.on_close is not None:
+                self.on_close(entry.key, entry.slide)
+            entry.slide.close()
+            entry.slide = None
+
+
+# pools to empty in a fork child, and to reap
+_pools: weakref.WeakSet[SlidePool] = weakref.WeakSet()
+# bounds on the reaper's polling interval, in seconds
+_REAP_MIN_INTERVAL = 0.01
+_REAP_MAX_INTERVAL = 60
+_reaper: threading.Thread | None = None
+_reaper_lock = threading.Lock()
+# set to make the reaper recompute its interval
+_reaper_wake = threading.Event()
+
+
+def _start_reaper() -> None:
+    '''Start the reaper thread, or wake it to pick up a new pool.'''
+    global _reaper
+    with _reaper_lock:
+        if _reaper is None:
+            _reaper = threading.Thread(
+                target=_reap, name='openslide-pool-reaper', daemon=True
+            )
+            _reaper.start()
+        else:
+            _reaper_wake.set()
+
+
+def _reap() -> None:
+    '''Prune idle handles from every pool until no pool has an idle TTL.'''
+    global _reaper
+    while True:
+        with _reaper_lock:
+            ttls = [p.idle_ttl for p in _pools if p.idle_ttl is not None]
+            if not ttls:
+                _reaper = None
+                return
+            _reaper_wake.clear()
+        interval = min(
+            max(min(ttls) / 2, _REAP_MIN_INTERVAL), _REAP_MAX_INTERVAL
+        )
+        _reaper_wake.wait(interval)
+        _prune_all()
+
+
+def _prune_all() -> None:
+    # a separate function, so the reaper doesn't hold a reference to the
+    # last pool while it waits
+    for pool in list(_pools):
+        pool.prune()
+
+
+def _after_fork_in_child() -> None:
+    global _reaper, _reaper_lock, _reaper_wake
+    for pool in _pools:
+        # the handles themselves are abandoned by openslide_bin.handle
+        pool._lock = threading.Lock()
+        pool._entries.clear()
+        pool._by_slide.clear()
+    # the reaper thread doesn't exist here; acquire() restarts it
+    _reaper = None
+    _reaper_lock = threading.Lock()
+    _reaper_wake = threading.Event()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
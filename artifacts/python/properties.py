@@ -0,0 +1,173 @@
+#
+# openslide-bin - Wrapper for OpenSlide binary build
+#
+# Copyright (c) 2026 Benjamin Gilbert
+#
+# This library is free software; you can redistribute it and/or modify it
+# under the terms of version 2.1 of the GNU Lesser General Public License
+# as published by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
+# License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+'''Immutable property snapshots with typed accessors.
+
+Reading a slide's properties takes a ctypes call per property, plus a
+string decode for every name and value, and code that needs the level
+geometry or MPP on each request pays that every time.  A slide's
+properties never change while it's open, so snapshot() reads them once
+per handle, decodes them all in one pass, and caches the result.
+
+The snapshot is a read-only mapping of property names to values.  Level
+geometry, MPP, bounds, and other common properties are parsed up front,
+with per-level values in compact read-only arrays.'''
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterator, Mapping
+import os
+import threading
+import weakref
+
+from openslide_bin import bindings
+from openslide_bin.handle import Slide
+
+
+def _int(props: Mapping[str, str], name: str) -> int | None:
+    try:
+        return int(props[name])
+    except (KeyError, ValueError):
+        return None
+
+
+def _float(props: Mapping[str, str], name: str) -> float | None:
+    try:
+        return float(props[name])
+    except (KeyError, ValueError):
+        return None
+
+
+class SlideProperties(Mapping[str, str]):
+    '''A read-only snapshot of slide properties.'''
+
+    def __init__(self, props: Mapping[str, str]):
+        self._props = p = dict(props)
+
+        widths = array('q')
+        heights = array('q')
+        downsamples = array('d')
+        tile_widths = array('q')
+        tile_heights = array('q')
+        self.level_count = _int(p, 'openslide.level-count') or 0
+        for i in range(self.level_count):
+            prefix = f'openslide.level[{i}].'
+            widths.append(_int(p, prefix + 'width') or 0)
+            heights.append(_int(p, prefix + 'height') or 0)
+            downsamples.append(_float(p, prefix + 'downsample') or 1.0)
+            # 0 if the format has no native tile size
+            tile_widths.append(_int(p, prefix + 'tile-width') or 0)
+            tile_heights.append(_int(p, prefix + 'tile-height') or 0)
+        # per-level values, indexed by level
+        self.level_widths = memoryview(widths).toreadonly()
+        self.level_heights = memoryview(heights).toreadonly()
+        self.level_downsamples = memoryview(downsamples).toreadonly()
+        self.tile_widths = memoryview(tile_widths).toreadonly()
+        self.tile_heights = memoryview(tile_heights).toreadonly()
+
+        # microns per pixel at level 0, or None if unknown
+        self.mpp: tuple[float, float] | None = None
+        mpp_x = _float(p, 'openslide.mpp-x')
+        mpp_y = _float(p, 'openslide.mpp-y')
+        if mpp_x and mpp_y:
+            self.mpp = mpp_x, mpp_y
+        # level 0 x, y, width, height of the non-empty region, or None if
+        # the format doesn't report one
+        self.bounds: tuple[int, int, int, int] | None = None
+        x, y, w, h = (
+            _int(p, f'openslide.bounds-{name}')
+            for name in ('x', 'y', 'width', 'height')
+        )
+        if x is not None and y is not None and w is not None and h is not None:
+            self.bounds = x, y, w, h
+        self.vendor = p.get('openslide.vendor')
+        self.objective_power = _float(p, 'openslide.objective-power')
+        try:
+            color = int(p.get('openslide.background-color', 'FFFFFF'), 16)
+        except ValueError:
+            color = 0xFFFFFF
+        # RGB background color, white if unspecified
+        self.background_color = (
+            color >> 16 & 0xFF,
+            color >> 8 & 0xFF,
+            color & 0xFF,
+        )
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({self._props!r})'
+
+    def __getitem__(self, name: str) -> str:
+        return self._props[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._props)
+
+    def __len__(self) -> int:
+        return len(self._props)
+
+    def level_dimensions(self, level: int) -> tuple[int, int]:
+        '''Return the width and height of a level.'''
+        if not 0 <= level < self.level_count:
+            raise ValueError(f'Invalid level {level}')
+        return self.level_widths[level], self.level_heights[level]
+
+
+def _read(slide: Slide) -> dict[str, str]:
+    names = bindings.openslide_get_property_names(slide)
+    keys: list[bytes] = []
+    while names[len(keys)] is not None:
+        keys.append(names[len(keys)])
+    values: list[bytes] = [
+        bindings.openslide_get_property_value(slide, key) for key in keys
+    ]
+    slide.check()
+    # decode everything at once; C strings can't contain NUL.  As in
+    # openslide-python, replace invalid UTF-8 rather than failing the whole
+    # snapshot for one bad value.
+    strings = b'\0'.join(keys + values).decode(errors='replace').split('\0')
+    return dict(zip(strings[: len(keys)], strings[len(keys) :]))
+
+
+def snapshot(slide: Slide) -> SlideProperties:
+    '''Return the properties of a slide, reading them on first use.'''
+    with _lock:
+        props = _snapshots.get(slide)
+    if props is None:
+        # read outside the lock; a racing thread's snapshot is equivalent
+        props = SlideProperties(_read(slide))
+        with _lock:
+            props = _snapshots.setdefault(slide, props)
+    return props
+
+
+_snapshots: weakref.WeakKeyDictionary[Slide, SlideProperties] = (
+    weakref.WeakKeyDictionary()
+)
+_lock = threading.Lock()
+
+
+def _after_fork_in_child() -> None:
+    global _lock
+    # inherited slides are unusable in the child
+    _snapshots.clear()
+    _lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
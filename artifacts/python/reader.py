@@ -0,0 +1,160 @@
+#
+# openslide-bin - Wrapper for OpenSlide binary build
+#
+# Copyright (c) 2026 Benjamin Gilbert
+#
+# This library is free software; you can redistribute it and/or modify it
+# under the terms of version 2.1 of the GNU Lesser General Public License
+# as published by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
+# License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+'''Read many regions in parallel on a thread pool.
+
+ctypes releases the GIL while OpenSlide is decoding, and OpenSlide handles
+are thread-safe, so a single handle can be shared by all the workers.  The
+workers share no Python state, so they also scale on free-threaded
+CPython.'''
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+import os
+from types import TracebackType
+
+from openslide_bin.handle import Slide
+from openslide_bin.region import Region, read_region
+
+
+class TileReader:
+    '''Read regions of a Slide on a pool of worker threads.
+
+    At most max_in_flight regions, totaling at most max_bytes of pixels,
+    are queued or being read at once, which bounds the memory held by
+    results the caller hasn't consumed yet.  A region larger than max_bytes
+    is still read, but only when nothing else is in flight.'''
+
+    def __init__(
+        self,
+        slide: Slide,
+        workers: int | None = None,
+        max_in_flight: int | None = None,
+        max_bytes: int | None = None,
+    ):
+        self.slide = slide
+        self.workers = workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or 2 * self.workers
+        if self.max_in_flight < 1:
+            raise ValueError('max_in_flight must be positive')
+        self.max_bytes = max_bytes
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError('max_bytes must be positive')
+        self._executor = ThreadPoolExecutor(
+            self.workers, thread_name_prefix='openslide-reader'
+        )
+
+    def __enter__(self) -> TileReader:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        '''Stop the workers, discarding queued reads.  Doesn't close the
+        Slide.'''
+        self._executor.shutdown(cancel_futures=True)
+
+    def _full(self, count: int, nbytes: int, region: Region) -> bool:
+        '''Return True if region can't be submitted until some of the count
+        regions, totaling nbytes, in flight have been consumed.'''
+        if count == 0:
+            return False
+        return count >= self.max_in_flight or (
+            self.max_bytes is not None
+            and nbytes + region.nbytes > self.max_bytes
+        )
+
+    def _read(self, region: Region) -> tuple[Region, bytearray]:
+        buf = bytearray(region.nbytes)
+        read_region(self.slide, buf, *region)
+        return region, buf
+
+    def read(
+        self, regions: Iterable[tuple[int, int, int, int, int]]
+    ) -> Iterator[tuple[Region, bytearray]]:
+        '''Read (level, x, y, w, h) regions and yield (region, pixels) in
+        request order.  Pixels are premultiplied ARGB, as from
+        read_region().'''
+        pending: deque[Future[tuple[Region, bytearray]]] = deque()
+        sizes: deque[int] = deque()
+        nbytes = 0
+        try:
+            for r in regions:
+                region = Region(*r)
+                while self._full(len(pending), nbytes, region):
+                    nbytes -= sizes.popleft()
+                    yield pending.popleft().result()
+                pending.append(self._executor.submit(self._read, region))
+                sizes.append(region.nbytes)
+                nbytes += region.nbytes
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # the caller stopped early or a read failed
+            for future in pending:
+                future.cancel()
+
+    def read_unordered(
+        self, regions: Iterable[tuple[int, int, int, int, int]]
+    ) -> Iterator[tuple[Region, bytearray]]:
+        '''Read (level, x, y, w, h) regions and yield (region, pixels) as
+        each read completes.'''
+        it = iter(regions)
+        pending: set[Future[tuple[Region, bytearray]]] = set()
+        nbytes = 0
+        # next region, if it didn't fit
+        region: Region | None = None
+        try:
+            exhausted = False
+            while True:
+                while not exhausted:
+                    if region is None:
+                        try:
+                            region = Region(*next(it))
+                        except StopIteration:
+                            exhausted = True
+                            break
+                    if self._full(len(pending), nbytes, region):
+                        break
+                    pending.add(self._executor.submit(self._read, region))
+                    nbytes += region.nbytes
+                    region = None
+                if not pending:
+                    return
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    nbytes -= result[0].nbytes
+                    yield result
+        finally:
+            for future in pending:
+                future.cancel()
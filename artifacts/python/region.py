@@ -0,0 +1,125 @@
+#
+# openslide-bin - Wrapper for OpenSlide binary build
+#
+# Copyright (c) 2026 Benjamin Gilbert
+#
+# This library is free software; you can redistribute it and/or modify it
+# under the terms of version 2.1 of the GNU Lesser General Public License
+# as published by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
+# License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+'''Read regions directly into caller-supplied buffers.
+
+OpenSlide writes premultiplied ARGB pixels, one native-endian 32-bit word
+per pixel.  The functions here pass the caller's memory straight to
+openslide_read_region(), so there's no intermediate allocation or copy.
+Any writable, C-contiguous object supporting the buffer protocol will do:
+bytearray, memoryview, mmap, array.array, or a NumPy array.'''
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from ctypes import Array, addressof, alignment, c_uint32, sizeof
+from typing import TYPE_CHECKING, NamedTuple
+
+from openslide_bin import bindings
+from openslide_bin.handle import Slide
+
+if TYPE_CHECKING:
+    from _typeshed import WriteableBuffer
+
+PIXEL_SIZE = sizeof(c_uint32)
+
+
+class Region(NamedTuple):
+    '''A region to read.  x and y are in the level 0 reference frame; w and
+    h are in pixels of the specified level.'''
+
+    level: int
+    x: int
+    y: int
+    w: int
+    h: int
+
+    @property
+    def nbytes(self) -> int:
+        return self.w * self.h * PIXEL_SIZE
+
+
+def _pixels(
+    buf: WriteableBuffer, count: int, offset: int = 0
+) -> Array[c_uint32]:
+    '''Return a ctypes array aliasing count pixels of buf, starting at byte
+    offset, after checking that buf is usable as a destination.'''
+    view = memoryview(buf)
+    if view.readonly:
+        raise TypeError('Buffer is read-only')
+    if not view.c_contiguous:
+        raise ValueError('Buffer is not C-contiguous')
+    need = offset + count * PIXEL_SIZE
+    if view.nbytes < need:
+        raise ValueError(f'Buffer too small: {view.nbytes} < {need} bytes')
+    pixels = (c_uint32 * count).from_buffer(view.cast('B'), offset)
+    if addressof(pixels) % alignment(c_uint32):
+        raise ValueError(
+            f'Buffer is not aligned to {alignment(c_uint32)} bytes'
+        )
+    return pixels
+
+
+def read_region(
+    slide: Slide,
+    buf: WriteableBuffer,
+    level: int,
+    x: int,
+    y: int,
+    w: int,
+    h: int,
+) -> None:
+    '''Read a w x h region of the specified level into buf, which must hold
+    at least w * h * 4 bytes.  x and y are in the level 0 reference
+    frame.'''
+    if w < 0 or h < 0:
+        raise ValueError(f'Negative region size: {w} x {h}')
+    bindings.openslide_read_region(
+        slide, _pixels(buf, w * h), x, y, level, w, h
+    )
+    slide.check()
+
+
+def read_regions(
+    slide: Slide, slab: WriteableBuffer, regions: Iterable[Region]
+) -> list[memoryview]:
+    '''Read many regions into one preallocated slab, packed back to back in
+    order.  Return a byte view of each region's pixels within the slab.'''
+    regions = [Region(*r) for r in regions]
+    for r in regions:
+        if r.w < 0 or r.h < 0:
+            raise ValueError(f'Negative region size: {r.w} x {r.h}')
+    # check the whole slab up front, so we don't fail halfway through
+    _pixels(slab, sum(r.nbytes for r in regions) // PIXEL_SIZE)
+    view = memoryview(slab).cast('B')
+    views = []
+    offset = 0
+    for r in regions:
+        bindings.openslide_read_region(
+            slide,
+            _pixels(view, r.w * r.h, offset),
+            r.x,
+            r.y,
+            r.level,
+            r.w,
+            r.h,
+        )
+        slide.check()
+        views.append(view[offset : offset + r.nbytes])
+        offset += r.nbytes
+    return views
@@ -0,0 +1,100 @@
+#
+# openslide-bin - Wrapper for OpenSlide binary build
+#
+# Copyright (c) 2026 Benjamin Gilbert
+#
+# This library is free software; you can redistribute it and/or modify it
+# under the terms of version 2.1 of the GNU Lesser General Public License
+# as published by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
+# License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+'''Scan every tile of a level, reading ahead.
+
+A loop that reads a tile and then processes it leaves OpenSlide idle while
+the caller works, and the caller idle while OpenSlide decodes.  scan()
+keeps upcoming tiles decoding on a thread pool while the caller processes
+the current one.  Read-ahead is bounded by tile count and by bytes, and
+stops whenever the caller falls behind.
+
+Tiles are visited in row-major order, or in serpentine order, which
+reverses direction on alternate rows so that consecutive tiles are always
+adjacent.'''
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from ctypes import byref, c_int64
+
+from openslide_bin import bindings
+from openslide_bin.handle import Slide
+from openslide_bin.reader import TileReader
+from openslide_bin.region import Region, read_region
+
+ORDERS = ('row-major', 'serpentine')
+DEFAULT_MAX_BYTES = 64 << 20
+
+
+def scan_regions(
+    slide: Slide,
+    level: int = 0,
+    tile_size: int = 256,
+    order: str = 'row-major',
+) -> Iterator[Region]:
+    '''Yield the tile_size x tile_size tiles of a level in the specified
+    order.  Tiles at the right and bottom edges are truncated to the level
+    bounds.'''
+    if order not in ORDERS:
+        raise ValueError(f'Unknown scan order: {order}')
+    if tile_size < 1:
+        raise ValueError('Invalid tile size')
+    w, h = c_int64(), c_int64()
+    bindings.openslide_get_level_dimensions(slide, level, byref(w), byref(h))
+    downsample = float(bindings.openslide_get_level_downsample(slide, level))
+    slide.check()
+    if w.value < 0:
+        raise ValueError(f'Invalid level {level}')
+    columns = range(0, w.value, tile_size)
+    for row, y in enumerate(range(0, h.value, tile_size)):
+        reverse = order == 'serpentine' and row % 2 == 1
+        for x in reversed(columns) if reverse else columns:
+            yield Region(
+                level,
+                int(x * downsample),
+                int(y * downsample),
+                min(tile_size, w.value - x),
+                min(tile_size, h.value - y),
+            )
+
+
+def scan(
+    slide: Slide,
+    level: int = 0,
+    tile_size: int = 256,
+    order: str = 'row-major',
+    prefetch: int = 8,
+    max_bytes: int | None = DEFAULT_MAX_BYTES,
+    workers: int | None = None,
+) -> Iterator[tuple[Region, bytearray]]:
+    '''Read every tile of a level and yield (region, pixels) in scan order.
+    Keep up to prefetch tiles, totaling at most max_bytes, decoding ahead
+    of the caller on workers threads.  If prefetch is 0, read each tile
+    only when the caller asks for it.'''
+    regions = scan_regions(slide, level, tile_size, order)
+    if prefetch <= 0:
+        for region in regions:
+            buf = bytearray(region.nbytes)
+            read_region(slide, buf, *region)
+            yield region, buf
+        return
+    with TileReader(
+        slide, workers or min(prefetch, 8), prefetch, max_bytes
+    ) as reader:
+        yield from reader.read(regions)
@@ -0,0 +1,489 @@
+#
+# openslide-bin - Wrapper for OpenSlide binary build
+#
+# Copyright (c) 2026 Benjamin Gilbert
+#
+# This library is free software; you can redistribute it and/or modify it
+# under the terms of version 2.1 of the GNU Lesser General Public License
+# as published by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
+# License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+'''A Deep Zoom tile server using only the standard library.
+
+Run with "python -m openslide_bin.serve DIR" to serve the slides in DIR:
+
+    GET /                                   JSON list of slides
+    GET /SLIDE.dzi                          Deep Zoom descriptor
+    GET /SLIDE_files/LEVEL/COL_ROW.png      PNG tile
+    GET /SLIDE_files/LEVEL/COL_ROW.raw      8-bit RGBA tile, with its size in
+                                            X-Tile-Width and X-Tile-Height
+    GET /stats                              JSON server statistics
+
+SLIDE is the path of the slide relative to DIR.  Tiles are decoded on a
+bounded thread pool; concurrent requests for the same tile share one
+decode.  Responses carry an ETag derived from the slide file's identity,
+so revalidation doesn't decode anything.  This is a reference server for
+load testing, not a hardened public service.'''
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+import json
+import os
+import re
+import stat
+import struct
+import threading
+import time
+from typing import TypeVar
+from urllib.parse import unquote, urlsplit
+import zlib
+
+import openslide_bin
+from openslide_bin import bindings
+from openslide_bin.convert import argb_to_rgba
+from openslide_bin.deepzoom import DeepZoomSource
+from openslide_bin.handle import OpenSlideError, Slide
+from openslide_bin.pool import SlidePool
+
+T = TypeVar('T')
+
+# seconds to keep an idle connection open
+KEEPALIVE_TIMEOUT = 60
+MAX_HEADERS = 100
+
+_TILE_RE = re.compile(
+    r'/(?P<slide>.+)_files/(?P<level>[0-9]+)/(?P<col>[0-9]+)_(?P<row>[0-9]+)'
+    r'\.(?P<format>png|raw)'
+)
+_DZI_RE = re.compile(r'/(?P<slide>.+)\.dzi')
+
+_REASONS = {
+    200: 'OK',
+    304: 'Not Modified',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    500: 'Internal Server Error',
+}
+
+
+class _HTTPError(Exception):
+    def __init__(self, status: int, message: str | None = None):
+        super().__init__(status, message)
+        self.status = status
+        self.message = message or _REASONS[status]
+
+    def __str__(self) -> str:
+        return self.message
+
+
+@dataclass
+class _Response:
+    status: int
+    body: bytes = b''
+    content_type: str = 'text/plain; charset=utf-8'
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class ServerStats:
+    connections: int = 0
+    open_connections: int = 0
+    requests: int = 0
+    # response count by status code
+    responses: dict[int, int] = field(default_factory=dict)
+    bytes_sent: int = 0
+    # tiles decoded, and tile requests served by another request's decode
+    tiles_decoded: int = 0
+    tiles_shared: int = 0
+    # tile decodes queued or running
+    decodes_pending: int = 0
+    decode_seconds: float = 0.0
+
+
+def _encode_png(width: int, height: int, rgba: bytes | bytearray) -> bytes:
+    '''Encode 8-bit RGBA pixels as a PNG.'''
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (
+            struct.pack('>I', len(data))
+            + kind
+            + data
+            + struct.pack('>I', zlib.crc32(kind + data))
+        )
+
+    stride = width * 4
+    # each row is prefixed with filter type 0
+    raw = bytearray((stride + 1) * height)
+    for y in range(height):
+        start = y * (stride + 1) + 1
+        raw[start : start + stride] = rgba[y * stride : (y + 1) * stride]
+    return (
+        b'\x89PNG\r\n\x1a\n'
+        + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0))
+        + chunk(b'IDAT', zlib.compress(raw))
+        + chunk(b'IEND', b'')
+    )
+
+
+class TileServer:
+    '''Serve Deep Zoom tiles for the slides under root, decoding at most
+    workers tiles at a time.'''
+
+    def __init__(
+        self,
+        root: str | os.PathLike[str],
+        workers: int | None = None,
+        tile_size: int = 254,
+        overlap: int = 1,
+        limit_bounds: bool = False,
+        max_handles: int = 64,
+    ):
+        self.root = os.path.realpath(root)
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.limit_bounds = limit_bounds
+        self.pool = SlidePool(
+            max_handles=max_handles, on_close=self._forget_source
+        )
+        self.stats = ServerStats()
+        self._executor = ThreadPoolExecutor(
+            workers or os.cpu_count() or 1,
+            thread_name_prefix='openslide-serve',
+        )
+        self._started = time.monotonic()
+        # by pool identity; dropped when the pool closes the slide
+        self._sources: dict[tuple[str, int, int, int], DeepZoomSource] = {}
+        self._sources_lock = threading.Lock()
+        self._decodes: dict[
+            tuple[str, int, int, int, str],
+            asyncio.Future[tuple[int, int, bytes]],
+        ] = {}
+
+    async def serve(self, host: str, port: int) -> None:
+        '''Serve until cancelled.'''
+        server = await asyncio.start_server(self._connection, host, port)
+        async with server:
+            await server.serve_forever()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self.pool.close()
+
+    async def _connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.stats.connections += 1
+        self.stats.open_connections += 1
+        try:
+            while await self._request(reader, writer):
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.stats.open_connections -= 1
+            writer.close()
+
+    async def _request(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> bool:
+        '''Handle one request and return whether to keep the connection
+        open.'''
+        read = asyncio.ensure_future(reader.readline())
+        done, _ = await asyncio.wait({read}, timeout=KEEPALIVE_TIMEOUT)
+        if not done:
+            # idle
+            read.cancel()
+            return False
+        line = read.result()
+        if not line:
+            return False
+        self.stats.requests += 1
+        method = ''
+        keep_alive = False
+        try:
+            try:
+                method, target, version = line.decode('latin-1').split()
+            except ValueError:
+                raise _HTTPError(400) from None
+            headers: dict[str, str] = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                if len(headers) >= MAX_HEADERS:
+                    raise _HTTPError(400, 'Too many headers')
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            connection = headers.get('connection', '').lower()
+            if version == 'HTTP/1.1':
+                keep_alive = connection != 'close'
+            else:
+                keep_alive = connection == 'keep-alive'
+            if 'content-length' in headers or 'transfer-encoding' in headers:
+                # we don't accept request bodies; don't try to skip them
+                keep_alive = False
+            if method not in ('GET', 'HEAD'):
+                raise _HTTPError(405)
+            response = await self._dispatch(
+                unquote(urlsplit(target).path), headers
+            )
+        except _HTTPError as e:
+            response = _Response(e.status, f'{e}\n'.encode())
+        except ValueError as e:
+            # includes a request line or header longer than the stream limit
+            response = _Response(400, f'{e}\n'.encode())
+            keep_alive = False
+
+        self.stats.responses[response.status] = (
+            self.stats.responses.get(response.status, 0) + 1
+        )
+        head = [
+            f'HTTP/1.1 {response.status} {_REASONS[response.status]}',
+            f'Server: openslide-bin/{openslide_bin.__version__}',
+            f'Connection: {"keep-alive" if keep_alive else "close"}',
+        ]
+        if response.status != 304:
+            head += [
+                f'Content-Type: {response.content_type}',
+                f'Content-Length: {len(response.body)}',
+            ]
+        head += [f'{k}: {v}' for k, v in response.headers.items()]
+        data = ('\r\n'.join(head) + '\r\n\r\n').encode('latin-1')
+        if method != 'HEAD' and response.status != 304:
+            data += response.body
+        writer.write(data)
+        await writer.drain()
+        self.stats.bytes_sent += len(data)
+        return keep_alive
+
+    async def _dispatch(self, path: str, headers: dict[str, str]) -> _Response:
+        if path == '/':
+            body = await self._run(self._list_slides)
+            return _Response(200, body, 'application/json')
+        if path == '/stats':
+            stats = asdict(self.stats)
+            stats['uptime_seconds'] = time.monotonic() - self._started
+            stats['pool'] = asdict(self.pool.stats)
+            return _Response(
+                200,
+                json.dumps(stats, indent=2, sort_keys=True).encode(),
+                'application/json',
+            )
+
+        m = _TILE_RE.fullmatch(path) or _DZI_RE.fullmatch(path)
+        if m is None:
+            raise _HTTPError(404)
+        slide_path, etag = await self._run(lambda: self._resolve(m['slide']))
+        if etag in (
+            tag.strip() for tag in headers.get('if-none-match', '').split(',')
+        ):
+            return _Response(304, headers={'ETag': etag})
+
+        if m.re is _DZI_RE:
+            dzi = await self._run(lambda: self._dzi(slide_path))
+            return _Response(
+                200, dzi.encode(), 'application/xml', {'ETag': etag}
+            )
+
+        key = (
+            slide_path,
+            int(m['level']),
+            int(m['col']),
+            int(m['row']),
+            m['format'],
+        )
+        w, h, body = await self._tile(key)
+        if m['format'] == 'png':
+            return _Response(200, body, 'image/png', {'ETag': etag})
+        return _Response(
+            200,
+            body,
+            'application/octet-stream',
+            {'ETag': etag, 'X-Tile-Width': str(w), 'X-Tile-Height': str(h)},
+        )
+
+    def _resolve(self, name: str) -> tuple[str, str]:
+        '''Map a slide name to a path under the root, and return the path
+        and its ETag.  Runs on the decode pool, since it touches the
+        filesystem.'''
+        path = os.path.realpath(os.path.join(self.root, name))
+        if not path.startswith(self.root + os.sep):
+            raise _HTTPError(404)
+        try:
+            st = os.stat(path)
+        except OSError:
+            raise _HTTPError(404) from None
+        if not stat.S_ISREG(st.st_mode):
+            raise _HTTPError(404)
+        # tiles depend on the slide file and the tiling parameters
+        params = f'{self.tile_size}-{self.overlap}-{int(self.limit_bounds)}'
+        etag = (
+            f'"{st.st_dev:x}-{st.st_ino:x}-{st.st_mtime_ns:x}-'
+            f'{st.st_size:x}-{params}"'
+        )
+        return path, etag
+
+    async def _run(self, func: Callable[[], T]) -> T:
+        '''Run an OpenSlide call on the decode pool, mapping errors to HTTP
+        statuses.'''
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, func
+            )
+        except ValueError as e:
+            # invalid tile address
+            raise _HTTPError(404, str(e)) from e
+        except OpenSlideError as e:
+            raise _HTTPError(500, str(e)) from e
+
+    async def _tile(
+        self, key: tuple[str, int, int, int, str]
+    ) -> tuple[int, int, bytes]:
+        future = self._decodes.get(key)
+        if future is not None:
+            self.stats.tiles_shared += 1
+            return await asyncio.shield(future)
+        future = asyncio.get_running_loop().create_future()
+        self._decodes[key] = future
+        self.stats.decodes_pending += 1
+        start = time.perf_counter()
+        try:
+            result = await self._run(lambda: self._render(*key))
+            self.stats.tiles_decoded += 1
+            self.stats.decode_seconds += time.perf_counter() - start
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            # don't warn about an exception nobody else retrieved
+            future.exception()
+            raise
+        finally:
+            self.stats.decodes_pending -= 1
+            del self._decodes[key]
+
+    def _source(self, slide: Slide) -> DeepZoomSource:
+        # runs on the decode pool, with the slide checked out
+        identity = self.pool.identity(slide)
+        with self._sources_lock:
+            source = self._sources.get(identity)
+        if source is None or source.slide is not slide:
+            source = DeepZoomSource(
+                slide, self.tile_size, self.overlap, self.limit_bounds
+            )
+            with self._sources_lock:
+                self._sources[identity] = source
+        return source
+
+    def _forget_source(
+        self, identity: tuple[str, int, int, int], slide: Slide
+    ) -> None:
+        # called by the pool before closing a slide
+        with self._sources_lock:
+            source = self._sources.get(identity)
+            if source is not None and source.slide is slide:
+                del self._sources[identity]
+
+    def _dzi(self, path: str) -> str:
+        # runs on the decode pool
+        with self.pool.checkout(path) as slide:
+            dzi: str = self._source(slide).get_dzi('png')
+        return dzi
+
+    def _render(
+        self, path: str, level: int, col: int, row: int, format: str
+    ) -> tuple[int, int, bytes]:
+        # runs on the decode pool
+        with self.pool.checkout(path) as slide:
+            tile = self._source(slide).get_tile(level, col, row)
+            slide.check()
+        argb_to_rgba(tile.pixels, tile.pixels)
+        if format == 'png':
+            body = _encode_png(tile.width, tile.height, tile.pixels)
+        else:
+            body = bytes(tile.pixels)
+        return tile.width, tile.height, body
+
+    def _list_slides(self) -> bytes:
+        # runs on the decode pool
+        slides = []
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames.sort()
+            for name in sorted(filenames):
+                path = os.path.join(dirpath, name)
+                if bindings.openslide_detect_vendor(os.fsencode(path)):
+                    slides.append(os.path.relpath(path, self.root))
+        return json.dumps({'slides': slides}, indent=2).encode()
+
+
+class _Args(argparse.Namespace):
+    root: str
+    host: str
+    port: int
+    workers: int | None
+    tile_size: int
+    overlap: int
+    limit_bounds: bool
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog='python -m openslide_bin.serve',
+        description='Serve Deep Zoom tiles for a directory of slides.',
+    )
+    parser.add_argument('root', help='slide directory')
+    parser.add_argument(
+        '-l', '--host', default='127.0.0.1', help='address to listen on'
+    )
+    parser.add_argument(
+        '-p', '--port', type=int, default=8000, help='port to listen on'
+    )
+    parser.add_argument(
+        '-w', '--workers', type=int, help='maximum concurrent tile decodes'
+    )
+    parser.add_argument(
+        '-s', '--tile-size', type=int, default=254, help='tile size'
+    )
+    parser.add_argument(
+        '-e', '--overlap', type=int, default=1, help='tile overlap'
+    )
+    parser.add_argument(
+        '-B',
+        '--limit-bounds',
+        action='store_true',
+        help="only display the slide's non-empty region",
+    )
+    args = parser.parse_args(namespace=_Args())
+
+    server = TileServer(
+        args.root,
+        workers=args.workers,
+        tile_size=args.tile_size,
+        overlap=args.overlap,
+        limit_bounds=args.limit_bounds,
+    )
+    print(f'Serving {server.root} on http://{args.host}:{args.port}/')
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == '__main__':
+    main()
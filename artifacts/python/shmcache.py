@@ -0,0 +1,312 @@
+#
+# openslide-bin - Wrapper for OpenSlide binary build
+#
+# Copyright (c) 2026 Benjamin Gilbert
+#
+# This library is free software; you can redistribute it and/or modify it
+# under the terms of version 2.1 of the GNU Lesser General Public License
+# as published by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
+# License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+'''A tile cache shared by processes on the same host.
+
+OpenSlide's own cache is per process, so worker processes serving the same
+slides each decode the same tiles.  A SharedTileCache keeps decoded regions
+in a multiprocessing.shared_memory segment that every worker attaches to.
+
+The segment is divided into fixed-size slots.  A region's key hashes to a
+set of slots, and a region can only be stored in its set, so the slot
+metadata doubles as a hash index and lookups examine only one set.  When a
+set is full, a clock hand picks a victim that hasn't been read since the
+hand last passed it.
+
+Lookups take no locks.  Each slot has a sequence number that writers make
+odd while they modify the slot; a reader that sees an odd number, or a
+number that changed during its copy, treats the lookup as a miss.  Python
+can't issue memory barriers, so on weakly ordered CPUs such as ARM a
+reader could still see a stable sequence number with torn data.  Each
+slot therefore also stores a CRC-32 of its data, which the reader checks
+against its copy.  Writers
+serialize on a multiprocessing lock, which workers inherit when the cache
+is passed as a Process argument or to a Pool initializer.'''
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import hashlib
+from multiprocessing import shared_memory
+from multiprocessing.synchronize import Lock
+import os
+import struct
+import sys
+from typing import Any
+import zlib
+
+from openslide_bin.handle import Slide
+from openslide_bin.region import Region, read_region
+
+DEFAULT_CAPACITY = 256 << 20
+# a 256 x 256 tile
+DEFAULT_SLOT_SIZE = 256 << 10
+DEFAULT_WAYS = 8
+
+_MAGIC = b'OSBSHMC2'
+# magic, slot count, ways, slot size
+_HEADER = struct.Struct('=8sIIQ')
+# sequence number, key digest, data length, referenced bit, data CRC-32
+_META = struct.Struct('=Q16sIB3xI')
+_SEQ = struct.Struct('=Q')
+# the fields after the sequence number
+_ENTRY = struct.Struct('=16sIB3xI')
+_REF_OFFSET = 28
+_ALIGN = 64
+
+
+def _align(n: int) -> int:
+    return -(-n // _ALIGN) * _ALIGN
+
+
+def _buffer(shm: shared_memory.SharedMemory) -> memoryview:
+    buf = shm.buf
+    if buf is None:
+        raise ValueError('Shared memory is closed')
+    return buf
+
+
+@dataclass
+class SharedCacheStats:
+    # counters for this process only
+    hits: int = 0
+    misses: int = 0
+    inserts: int = 0
+    evictions: int = 0
+
+
+class SharedTileCache:
+    '''A cache of decoded regions in shared memory.  Create it with
+    create() in the parent process and pass it to workers, or attach to it
+    by name with attach().'''
+
+    def __init__(
+        self,
+        shm: shared_memory.SharedMemory,
+        lock: Lock | None,
+        owner: bool,
+    ):
+        self._shm = shm
+        self._buf = _buffer(shm)
+        self._lock = lock
+        self._owner = owner
+        magic, self.slots, self.ways, self.slot_size = _HEADER.unpack_from(
+            self._buf
+        )
+        if magic != _MAGIC:
+            raise ValueError(f'{shm.name} is not a shared tile cache')
+        self._sets = self.slots // self.ways
+        self._hands_offset = _align(_HEADER.size)
+        self._meta_offset = _align(self._hands_offset + 4 * self._sets)
+        self._data_offset = _align(self._meta_offset + _META.size * self.slots)
+        self.stats = SharedCacheStats()
+
+    @classmethod
+    def create(
+        cls,
+        capacity: int = DEFAULT_CAPACITY,
+        slot_size: int = DEFAULT_SLOT_SIZE,
+        ways: int = DEFAULT_WAYS,
+        lock: Lock | None = None,
+    ) -> SharedTileCache:
+        '''Create a cache holding up to capacity bytes of regions, each of
+        at most slot_size bytes.  Regions are stored in sets of ways slots.
+        If lock is None, create one from the default multiprocessing
+        context.'''
+        if slot_size < 1 or ways < 1:
+            raise ValueError('Invalid slot size or ways')
+        sets = capacity // slot_size // ways
+        if sets < 1:
+            raise ValueError('Capacity too small for one set of slots')
+        slots = sets * ways
+        size = (
+            _align(
+                _align(_align(_HEADER.size) + 4 * sets) + _META.size * slots
+            )
+            + slots * slot_size
+        )
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        # the segment is zero-filled: empty slots, even sequence numbers
+        _HEADER.pack_into(_buffer(shm), 0, _MAGIC, slots, ways, slot_size)
+        if lock is None:
+            import multiprocessing
+
+            lock = multiprocessing.Lock()
+        return cls(shm, lock, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, lock: Lock | None = None) -> SharedTileCache:
+        '''Attach to an existing cache by name.  Without the cache's lock,
+        the cache is read-only.'''
+        # don't let this process's resource tracker destroy the segment
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name, track=False)
+        else:
+            shm = shared_memory.SharedMemory(name)
+            if os.name == 'posix':
+                from multiprocessing import resource_tracker
+
+                tracked = shm._name  # type: ignore[attr-defined]
+                resource_tracker.unregister(tracked, 'shared_memory')
+        return cls(shm, lock, owner=False)
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (self.attach, (self.name, self._lock))
+
+    def __enter__(self) -> SharedTileCache:
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def close(self) -> None:
+        '''Detach from the cache.  If this process created it, destroy it.'''
+        self._shm.close()
+        if self._owner:
+            if sys.version_info < (3, 13) and os.name == 'posix':
+                # a process sharing our resource tracker may have
+                # unregistered the segment in attach(); unlink() expects it
+                # to be registered
+                from multiprocessing import resource_tracker
+
+                tracked = self._shm._name  # type: ignore[attr-defined]
+                resource_tracker.register(tracked, 'shared_memory')
+            self._shm.unlink()
+            self._owner = False
+
+    @staticmethod
+    def key(slide: Slide, region: Region) -> bytes:
+        '''Return the cache key for a region of a slide.  The slide is
+        identified by the identity and modification time of its file when
+        it was opened, so every process computes the same key.'''
+        st = slide.stat
+        if st is not None:
+            ident = f'{st.st_dev}:{st.st_ino}:{st.st_mtime_ns}:{st.st_size}'
+        else:
+            # the synthetic slide
+            ident = f'path:{slide.path}'
+        return hashlib.blake2b(
+            f'{ident}/{region.level}/{region.x}/{region.y}/{region.w}/'
+            f'{region.h}'.encode(),
+            digest_size=16,
+        ).digest()
+
+    def _set(self, key: bytes) -> range:
+        first = int.from_bytes(key[:8], 'little') % self._sets * self.ways
+        return range(first, first + self.ways)
+
+    def _meta(self, slot: int) -> int:
+        return self._meta_offset + slot * _META.size
+
+    def get(self, key: bytes) -> bytes | None:
+        '''Return the data cached under key, or None.'''
+        buf = self._buf
+        for slot in self._set(key):
+            meta = self._meta(slot)
+            seq, digest, length, _, crc = _META.unpack_from(buf, meta)
+            if seq & 1 or digest != key or not length:
+                continue
+            start = self._data_offset + slot * self.slot_size
+            data = bytes(buf[start : start + length])
+            after = _META.unpack_from(buf, meta)
+            if (
+                after[:3] != (seq, digest, length)
+                or after[4] != crc
+                or zlib.crc32(data) != crc
+            ):
+                # overwritten while we were copying, or we saw the writes
+                # out of order
+                continue
+            # mark referenced; a lost race only affects eviction order
+            buf[meta + _REF_OFFSET] = 1
+            self.stats.hits += 1
+            return data
+        self.stats.misses += 1
+        return None
+
+    def put(self, key: bytes, data: bytes | bytearray | memoryview) -> bool:
+        '''Cache data under key, evicting an older entry if necessary.
+        Return False if data is too large, or the cache is read-only.'''
+        view = memoryview(data).cast('B')
+        if self._lock is None or not 0 < view.nbytes <= self.slot_size:
+            return False
+        buf = self._buf
+        slots = self._set(key)
+        with self._lock:
+            victim = None
+            for slot in slots:
+                _, digest, length, _, _ = _META.unpack_from(
+                    buf, self._meta(slot)
+                )
+                if digest == key and length:
+                    # another worker got here first
+                    return True
+                if victim is None and not length:
+                    victim = slot
+            if victim is None:
+                victim = self._evict(slots)
+            meta = self._meta(victim)
+            seq = _SEQ.unpack_from(buf, meta)[0]
+            # readers ignore the slot while the sequence number is odd, so
+            # make it odd before touching anything else, and publish the
+            # even number last
+            _SEQ.pack_into(buf, meta, seq + 1)
+            _ENTRY.pack_into(
+                buf, meta + _SEQ.size, key, view.nbytes, 0, zlib.crc32(view)
+            )
+            start = self._data_offset + victim * self.slot_size
+            buf[start : start + view.nbytes] = view
+            _SEQ.pack_into(buf, meta, seq + 2)
+        self.stats.inserts += 1
+        return True
+
+    def _evict(self, slots: range) -> int:
+        # caller holds the lock
+        buf = self._buf
+        set_index = slots.start // self.ways
+        hand_offset = self._hands_offset + 4 * set_index
+        hand: int = struct.unpack_from('=I', buf, hand_offset)[0]
+        while True:
+            slot = slots.start + hand
+            hand = (hand + 1) % self.ways
+            ref_offset = self._meta(slot) + _REF_OFFSET
+            if buf[ref_offset]:
+                # second chance
+                buf[ref_offset] = 0
+                continue
+            struct.pack_into('=I', buf, hand_offset, hand)
+            self.stats.evictions += 1
+            return slot
+
+    def read_region(
+        self, slide: Slide, level: int, x: int, y: int, w: int, h: int
+    ) -> bytes:
+        '''Read a region of premultiplied ARGB pixels through the cache.'''
+        region = Region(level, x, y, w, h)
+        key = self.key(slide, region)
+        data = self.get(key)
+        if data is None:
+            pixels = bytearray(region.nbytes)
+            read_region(slide, pixels, *region)
+            self.put(key, pixels)
+            data = bytes(pixels)
+        return data
@@ -0,0 +1,166 @@
+#
+# openslide-bin - Wrapper for OpenSlide binary build
+#
+# Copyright (c) 2026 Benjamin Gilbert
+#
+# This library is free software; you can redistribute it and/or modify it
+# under the terms of version 2.1 of the GNU Lesser General Public License
+# as published by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
+# License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+'''Generate slide thumbnails from the best pyramid level.
+
+A thumbnail only needs the coarsest level with at least its resolution,
+so thumbnail() reads that level, as chosen by
+openslide_get_best_level_for_downsample(), rather than a finer one.  The
+level is read in horizontal strips of bounded size on a thread pool, and
+a BoxFilter accumulates each strip's contribution to the thumbnail as soon
+as it arrives.  Only a few strips are in flight at once, so memory use is
+bounded by the strip size and the thumbnail size rather than the level
+size.
+
+If the slide has an associated thumbnail image at least as large as the
+requested size, it's resized to fit instead, keeping its own aspect
+ratio, and the pyramid isn't read at all.'''
+
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from ctypes import byref, c_int64
+import os
+from typing import Any, NamedTuple
+
+from openslide_bin import bindings
+from openslide_bin.convert import BoxFilter, resize_argb
+from openslide_bin.handle import Slide
+from openslide_bin.properties import snapshot
+from openslide_bin.region import read_region
+
+ASSOCIATED_THUMBNAIL = 'thumbnail'
+# source bytes to read per strip
+DEFAULT_STRIP_BYTES = 4 << 20
+
+
+class Thumbnail(NamedTuple):
+    '''A thumbnail, as premultiplied ARGB pixels.'''
+
+    width: int
+    height: int
+    pixels: bytearray
+
+
+def _fit(width: int, height: int, size: tuple[int, int]) -> tuple[int, int]:
+    '''Scale width x height to fit within size, preserving the aspect
+    ratio.'''
+    scale = min(size[0] / width, size[1] / height)
+    return (
+        max(1, min(size[0], round(width * scale))),
+        max(1, min(size[1], round(height * scale))),
+    )
+
+
+def _associated(slide: Slide, size: tuple[int, int]) -> Thumbnail | None:
+    '''Resize the associated thumbnail to fit within size, if it's large
+    enough.'''
+    w, h = c_int64(), c_int64()
+    bindings.openslide_get_associated_image_dimensions(
+        slide, ASSOCIATED_THUMBNAIL.encode(), byref(w), byref(h)
+    )
+    slide.check()
+    if w.value < 1 or h.value < 1:
+        # missing
+        return None
+    width, height = _fit(w.value, h.value, size)
+    if w.value < width or h.value < height:
+        # too small
+        return None
+    _, _, buf = slide.read_associated_image(ASSOCIATED_THUMBNAIL)
+    pixels: bytearray = resize_argb(buf, w.value, h.value, width, height)
+    return Thumbnail(width, height, pixels)
+
+
+def _read_strip(
+    slide: Slide,
+    box: BoxFilter,
+    level: int,
+    downsample: float,
+    y: int,
+    h: int,
+) -> tuple[int, Any]:
+    '''Read h rows of the level starting at y, and compute their
+    contribution to the thumbnail.  Runs on a worker thread.'''
+    buf = bytearray(box.src_w * h * 4)
+    read_region(slide, buf, level, 0, int(y * downsample), box.src_w, h)
+    contribution: tuple[int, Any] = box.filter(buf, y)
+    return contribution
+
+
+def thumbnail(
+    slide: Slide,
+    size: tuple[int, int],
+    workers: int | None = None,
+    use_associated: bool = True,
+    strip_bytes: int = DEFAULT_STRIP_BYTES,
+) -> Thumbnail:
+    '''Return a thumbnail of the slide that fits within size, preserving
+    the aspect ratio.  If use_associated is true, prefer the slide's
+    associated thumbnail image when it's large enough.  Read the pyramid
+    in strips of about strip_bytes on workers threads, with at most
+    workers + 1 strips in flight.'''
+    if size[0] < 1 or size[1] < 1:
+        raise ValueError(f'Invalid thumbnail size {size[0]} x {size[1]}')
+    if use_associated:
+        thumb = _associated(slide, size)
+        if thumb is not None:
+            return thumb
+
+    props = snapshot(slide)
+    l0_w, l0_h = props.level_dimensions(0)
+    downsample = max(l0_w / size[0], l0_h / size[1])
+    width, height = _fit(l0_w, l0_h, size)
+
+    level: int = bindings.openslide_get_best_level_for_downsample(
+        slide, downsample
+    )
+    slide.check()
+    level_w, level_h = props.level_dimensions(level)
+    level_downsample = props.level_downsamples[level]
+    box = BoxFilter(level_w, level_h, width, height)
+    # whole level rows, regardless of how many thumbnail rows they make
+    rows_per_strip = max(1, strip_bytes // (level_w * 4))
+    workers = workers or os.cpu_count() or 1
+
+    with ThreadPoolExecutor(
+        workers, thread_name_prefix='openslide-thumbnail'
+    ) as executor:
+        pending: deque[Future[tuple[int, Any]]] = deque()
+        try:
+            for y in range(0, level_h, rows_per_strip):
+                if len(pending) > workers:
+                    box.add(pending.popleft().result())
+                pending.append(
+                    executor.submit(
+                        _read_strip,
+                        slide,
+                        box,
+                        level,
+                        level_downsample,
+                        y,
+                        min(rows_per_strip, level_h - y),
+                    )
+                )
+            while pending:
+                box.add(pending.popleft().result())
+        finally:
+            for future in pending:
+                future.cancel()
+    return Thumbnail(width, height, box.result())
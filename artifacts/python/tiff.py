@@ -0,0 +1,300 @@
+#
+# openslide-bin - Wrapper for OpenSlide binary build
+#
+# Copyright (c) 2026 Benjamin Gilbert
+#
+# This library is free software; you can redistribute it and/or modify it
+# under the terms of version 2.1 of the GNU Lesser General Public License
+# as published by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
+# License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+'''Export slide levels to tiled BigTIFF.
+
+export_tiff() writes one level of a slide, or a power-of-2 pyramid built
+from it, as 8-bit RGBA tiles, either uncompressed or deflate-compressed.
+Tiles are read and encoded on a thread pool and appended to the file in
+order, with a bounded number in flight, so memory use doesn't depend on
+the size of the slide.  Each level's directory is written after its
+tiles, and linked from the previous one.
+
+Pyramid levels are read from the OpenSlide level best suited to their
+downsample and resized at most once, as in openslide_bin.deepzoom.  The
+output can be read by OpenSlide's generic TIFF support and by libtiff.'''
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+import math
+import os
+import struct
+from typing import BinaryIO
+import zlib
+
+import openslide_bin
+from openslide_bin import bindings
+from openslide_bin.convert import argb_to_rgba, resize_argb
+from openslide_bin.handle import Slide
+from openslide_bin.properties import snapshot
+from openslide_bin.region import Region, read_region
+
+COMPRESSIONS = ('none', 'deflate')
+
+# TIFF field types
+_SHORT = 3
+_LONG = 4
+_RATIONAL = 5
+_ASCII = 2
+_LONG8 = 16
+_TYPES = {_ASCII: 'B', _SHORT: 'H', _LONG: 'I', _RATIONAL: 'I', _LONG8: 'Q'}
+
+# TIFF tags
+_NEW_SUBFILE_TYPE = 254
+_IMAGE_WIDTH = 256
+_IMAGE_LENGTH = 257
+_BITS_PER_SAMPLE = 258
+_COMPRESSION = 259
+_PHOTOMETRIC = 262
+_SAMPLES_PER_PIXEL = 277
+_X_RESOLUTION = 282
+_Y_RESOLUTION = 283
+_PLANAR_CONFIGURATION = 284
+_RESOLUTION_UNIT = 296
+_SOFTWARE = 305
+_TILE_WIDTH = 322
+_TILE_LENGTH = 323
+_TILE_OFFSETS = 324
+_TILE_BYTE_COUNTS = 325
+_EXTRA_SAMPLES = 338
+
+
+class _BigTIFFWriter:
+    '''Append tiles and directories to a little-endian BigTIFF file.'''
+
+    def __init__(self, f: BinaryIO):
+        self._f = f
+        # magic, version, offset size, reserved, first IFD
+        f.write(struct.pack('<2sHHHQ', b'II', 43, 8, 0, 0))
+        # where to store the offset of the next IFD
+        self._next_ifd_ptr = 8
+
+    def _append(self, data: bytes | bytearray) -> int:
+        offset = self._f.seek(0, os.SEEK_END)
+        self._f.write(data)
+        if len(data) % 2:
+            # keep everything word-aligned
+            self._f.write(b'\0')
+        return offset
+
+    def write_tile(self, data: bytes | bytearray) -> tuple[int, int]:
+        return self._append(data), len(data)
+
+    def write_ifd(self, fields: dict[int, tuple[int, list[int]]]) -> None:
+        '''Write an IFD from tag -> (type, values) and link it into the
+        chain.'''
+        entries = []
+        for tag, (typ, values) in sorted(fields.items()):
+            data = struct.pack(f'<{len(values)}{_TYPES[typ]}', *values)
+            count = len(values) // 2 if typ == _RATIONAL else len(values)
+            if len(data) <= 8:
+                value = data.ljust(8, b'\0')
+            else:
+                value = struct.pack('<Q', self._append(data))
+            entries.append(struct.pack('<HHQ', tag, typ, count) + value)
+        offset = self._append(
+            struct.pack('<Q', len(entries))
+            + b''.join(entries)
+            + struct.pack('<Q', 0)
+        )
+        self._f.seek(self._next_ifd_ptr)
+        self._f.write(struct.pack('<Q', offset))
+        self._next_ifd_ptr = offset + 8 + 20 * len(entries)
+
+
+@dataclass(frozen=True)
+class _OutputLevel:
+    width: int
+    height: int
+    # downsample from level 0
+    downsample: float
+    # OpenSlide level to read from, and its downsample
+    source_level: int
+    source_downsample: float
+
+
+def _output_levels(
+    slide: Slide, level: int, pyramid: bool, tile_size: int
+) -> Iterator[_OutputLevel]:
+    props = snapshot(slide)
+    width, height = props.level_dimensions(level)
+    base_downsample: float = props.level_downsamples[level]
+    yield _OutputLevel(width, height, base_downsample, level, base_downsample)
+    scale = 2
+    while pyramid and max(width, height) > tile_size:
+        width = max(1, math.ceil(width / 2))
+        height = max(1, math.ceil(height / 2))
+        downsample = base_downsample * scale
+        source: int = bindings.openslide_get_best_level_for_downsample(
+            slide, downsample
+        )
+        yield _OutputLevel(
+            width,
+            height,
+            downsample,
+            source,
+            props.level_downsamples[source],
+        )
+        scale *= 2
+    slide.check()
+
+
+def _read_tile(
+    slide: Slide,
+    out: _OutputLevel,
+    tile_size: int,
+    col: int,
+    row: int,
+    compression: str,
+) -> bytes:
+    '''Read, convert, and encode one tile.  Runs on a worker thread.'''
+    x = col * tile_size
+    y = row * tile_size
+    if out.downsample == out.source_downsample:
+        # read the whole tile; OpenSlide pads past the edge of the level
+        region = Region(
+            out.source_level,
+            int(x * out.downsample),
+            int(y * out.downsample),
+            tile_size,
+            tile_size,
+        )
+        pixels = bytearray(region.nbytes)
+        read_region(slide, pixels, *region)
+    else:
+        w = min(tile_size, out.width - x)
+        h = min(tile_size, out.height - y)
+        scale = out.downsample / out.source_downsample
+        region = Region(
+            out.source_level,
+            int(x * out.downsample),
+            int(y * out.downsample),
+            max(1, math.ceil(w * scale)),
+            max(1, math.ceil(h * scale)),
+        )
+        source = bytearray(region.nbytes)
+        read_region(slide, source, *region)
+        resized = resize_argb(source, region.w, region.h, w, h)
+        pixels = bytearray(tile_size * tile_size * 4)
+        for i in range(h):
+            start = i * tile_size * 4
+            pixels[start : start + w * 4] = resized[
+                i * w * 4 : (i + 1) * w * 4
+            ]
+    argb_to_rgba(pixels, pixels)
+    if compression == 'deflate':
+        return zlib.compress(pixels)
+    return bytes(pixels)
+
+
+def export_tiff(
+    slide: Slide,
+    path: str | os.PathLike[str],
+    level: int = 0,
+    pyramid: bool = False,
+    tile_size: int = 256,
+    compression: str = 'deflate',
+    workers: int | None = None,
+) -> None:
+    '''Write a level of the slide to a tiled BigTIFF file at path.  If
+    pyramid is true, add successively halved levels until a level fits in
+    one tile.  tile_size must be a multiple of 16.'''
+    if compression not in COMPRESSIONS:
+        raise ValueError(f'Unknown compression: {compression}')
+    if tile_size < 16 or tile_size % 16:
+        raise ValueError('Tile size must be a positive multiple of 16')
+    workers = workers or os.cpu_count() or 1
+    mpp = snapshot(slide).mpp
+
+    with (
+        open(path, 'wb') as f,
+        ThreadPoolExecutor(
+            workers, thread_name_prefix='openslide-tiff'
+        ) as executor,
+    ):
+        writer = _BigTIFFWriter(f)
+        for i, out in enumerate(
+            _output_levels(slide, level, pyramid, tile_size)
+        ):
+            cols = math.ceil(out.width / tile_size)
+            rows = math.ceil(out.height / tile_size)
+            offsets = []
+            counts = []
+            pending: deque[Future[bytes]] = deque()
+            try:
+                for row in range(rows):
+                    for col in range(cols):
+                        if len(pending) >= 2 * workers:
+                            offset, count = writer.write_tile(
+                                pending.popleft().result()
+                            )
+                            offsets.append(offset)
+                            counts.append(count)
+                        pending.append(
+                            executor.submit(
+                                _read_tile,
+                                slide,
+                                out,
+                                tile_size,
+                                col,
+                                row,
+                                compression,
+                            )
+                        )
+                while pending:
+                    offset, count = writer.write_tile(
+                        pending.popleft().result()
+                    )
+                    offsets.append(offset)
+                    counts.append(count)
+            finally:
+                for future in pending:
+                    future.cancel()
+
+            fields = {
+                _NEW_SUBFILE_TYPE: (_LONG, [0 if i == 0 else 1]),
+                _IMAGE_WIDTH: (_LONG, [out.width]),
+                _IMAGE_LENGTH: (_LONG, [out.height]),
+                _BITS_PER_SAMPLE: (_SHORT, [8, 8, 8, 8]),
+                _COMPRESSION: (_SHORT, [8 if compression == 'deflate' else 1]),
+                # RGB
+                _PHOTOMETRIC: (_SHORT, [2]),
+                _SAMPLES_PER_PIXEL: (_SHORT, [4]),
+                # contiguous
+                _PLANAR_CONFIGURATION: (_SHORT, [1]),
+                _TILE_WIDTH: (_LONG, [tile_size]),
+                _TILE_LENGTH: (_LONG, [tile_size]),
+                _TILE_OFFSETS: (_LONG8, offsets),
+                _TILE_BYTE_COUNTS: (_LONG8, counts),
+                # unassociated alpha
+                _EXTRA_SAMPLES: (_SHORT, [2]),
+            }
+            if i == 0:
+                software = f'openslide-bin {openslide_bin.__version__}\0'
+                fields[_SOFTWARE] = (_ASCII, list(software.encode()))
+            if mpp is not None:
+                # pixels per centimeter, as rationals with denominator 1000
+                fields[_RESOLUTION_UNIT] = (_SHORT, [3])
+                for tag, value in zip((_X_RESOLUTION, _Y_RESOLUTION), mpp):
+                    numerator = round(1e7 / (value * out.downsample))
+                    fields[tag] = (_RATIONAL, [numerator, 1000])
+            writer.write_ifd(fields)
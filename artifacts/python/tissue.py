@@ -0,0 +1,242 @@
+#
+# openslide-bin - Wrapper for OpenSlide binary build
+#
+# Copyright (c) 2026 Benjamin Gilbert
+#
+# This library is free software; you can redistribute it and/or modify it
+# under the terms of version 2.1 of the GNU Lesser General Public License
+# as published by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
+# License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+'''Find the tiles of a slide that contain tissue.  Requires NumPy.
+
+Most of a slide is usually blank glass.  find_tissue() builds a mask of
+bounded size from the level best suited to it, marking mask pixels that
+are mostly neither transparent nor close to white, and selects the tiles
+of the requested level that overlap enough marked pixels.  The level is
+read in strips of bounded size and each strip is reduced into the mask as
+it arrives, so memory use doesn't depend on the level size, even on a
+slide with only one level.  Per-tile tissue fractions come from a
+summed-area table of the mask, so the work is vectorized regardless of
+the number of tiles.'''
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+import numpy as np
+from openslide_bin import bindings
+from openslide_bin.handle import Slide
+from openslide_bin.properties import snapshot
+from openslide_bin.reader import TileReader
+from openslide_bin.region import Region, read_region
+
+# maximum mask width and height
+DEFAULT_MASK_SIZE = 2048
+# pixels of the mask level to read at once
+MASK_STRIP_PIXELS = 1 << 20
+
+
+def _level_geometry(slide: Slide, level: int) -> tuple[int, int, float]:
+    props = snapshot(slide)
+    w, h = props.level_dimensions(level)
+    return w, h, props.level_downsamples[level]
+
+
+@dataclass
+class TissueTiles:
+    '''Tiles of one level that overlap tissue.'''
+
+    slide: Slide
+    level: int
+    tile_size: int
+    # level 0 coordinates of each selected tile, in row-major order
+    x: np.ndarray
+    y: np.ndarray
+    # pixel size of each selected tile, smaller at the right and bottom
+    # edges of the level
+    w: np.ndarray
+    h: np.ndarray
+    # number of tiles in the level
+    total: int
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    @property
+    def skipped_fraction(self) -> float:
+        '''The fraction of the level's tiles that were skipped.'''
+        return 1 - len(self) / self.total if self.total else 0.0
+
+    def regions(self) -> Iterator[Region]:
+        '''Yield the region of each selected tile.'''
+        for x, y, w, h in zip(
+            self.x.tolist(), self.y.tolist(), self.w.tolist(), self.h.tolist()
+        ):
+            yield Region(self.level, x, y, w, h)
+
+    def read(
+        self, prefetch: int = 0, workers: int | None = None
+    ) -> Iterator[tuple[Region, bytearray]]:
+        '''Read the selected tiles and yield (region, pixels) in order.  If
+        prefetch is positive, read up to that many tiles ahead on a pool of
+        worker threads.'''
+        if prefetch <= 0:
+            for region in self.regions():
+                buf = bytearray(region.nbytes)
+                read_region(self.slide, buf, *region)
+                yield region, buf
+            return
+        with TileReader(self.slide, workers, prefetch) as reader:
+            yield from reader.read(self.regions())
+
+
+def _bins(count: int, scale: float) -> tuple[np.ndarray, int]:
+    '''Map count source pixels to mask pixels at scale <= 1.  Return the
+    mask index of each source pixel, and the mask length.  Every mask pixel
+    gets at least one source pixel.'''
+    bins = (np.arange(count) * scale).astype(np.intp)
+    return bins, int(bins[-1]) + 1
+
+
+def tissue_mask(
+    slide: Slide,
+    level: int | None = None,
+    brightness: int = 220,
+    saturation: int = 20,
+    max_size: int = DEFAULT_MASK_SIZE,
+) -> tuple[np.ndarray, float]:
+    '''Compute a boolean tissue mask of the slide, at most max_size pixels
+    on a side, and return it with its downsample from level 0.  Read the
+    specified level, by default the best one for the mask's downsample.  A
+    level pixel is tissue if it's opaque enough to see and is darker than
+    brightness or has a channel range of at least saturation, and a mask
+    pixel is tissue if most of its level pixels are.'''
+    if max_size < 1:
+        raise ValueError('Invalid mask size')
+    l0_w, l0_h = snapshot(slide).level_dimensions(0)
+    downsample = max(1.0, max(l0_w, l0_h) / max_size)
+    if level is None:
+        level = bindings.openslide_get_best_level_for_downsample(
+            slide, downsample
+        )
+        slide.check()
+    w, h, level_downsample = _level_geometry(slide, level)
+    if w < 1 or h < 1:
+        raise ValueError(f'Level {level} is empty')
+    downsample = max(downsample, level_downsample)
+    # mask pixels per level pixel
+    scale = level_downsample / downsample
+    col_bins, mask_w = _bins(w, scale)
+    row_bins, mask_h = _bins(h, scale)
+    # level column at which each mask column starts
+    col_starts = np.searchsorted(col_bins, np.arange(mask_w))
+    col_counts = np.diff(np.append(col_starts, w))
+
+    # tissue pixels and level rows in each mask pixel and row
+    tissue = np.zeros((mask_h, mask_w), dtype=np.uint32)
+    row_counts = np.zeros(mask_h, dtype=np.uint32)
+    strip_height = max(1, MASK_STRIP_PIXELS // w)
+    for y in range(0, h, strip_height):
+        region = Region(
+            level,
+            0,
+            int(y * level_downsample),
+            w,
+            min(strip_height, h - y),
+        )
+        pixels = np.empty((region.h, region.w), dtype=np.uint32)
+        read_region(slide, pixels.data, *region)
+        a = pixels >> 24
+        channels = np.stack([(pixels >> shift) & 0xFF for shift in (16, 8, 0)])
+        # treat translucent pixels as if composited onto white
+        channels = channels + (255 - a)
+        lo = channels.min(axis=0)
+        hi = channels.max(axis=0)
+        strip = (a >= 128) & (
+            (channels.mean(axis=0) < brightness) | (hi - lo >= saturation)
+        )
+        # sum into mask columns, then into mask rows
+        cols = np.add.reduceat(strip, col_starts, axis=1, dtype=np.uint32)
+        rows, row_starts = np.unique(
+            row_bins[y : y + region.h], return_index=True
+        )
+        tissue[rows] += np.add.reduceat(cols, row_starts, axis=0)
+        row_counts[rows] += np.diff(np.append(row_starts, region.h)).astype(
+            np.uint32
+        )
+    mask = tissue.astype(np.uint64) * 2 > np.outer(row_counts, col_counts)
+    return mask, downsample
+
+
+def find_tissue(
+    slide: Slide,
+    level: int = 0,
+    tile_size: int = 256,
+    min_fraction: float = 0.0,
+    mask_level: int | None = None,
+    brightness: int = 220,
+    saturation: int = 20,
+    mask_size: int = DEFAULT_MASK_SIZE,
+) -> TissueTiles:
+    '''Find the tile_size x tile_size tiles of a level in which more than
+    min_fraction of the pixels are tissue, according to a tissue_mask() of
+    at most mask_size pixels on a side read from mask_level.'''
+    if tile_size < 1:
+        raise ValueError('Invalid tile size')
+    width, height, downsample = _level_geometry(slide, level)
+    mask, mask_downsample = tissue_mask(
+        slide, mask_level, brightness, saturation, mask_size
+    )
+    cols = -(-width // tile_size)
+    rows = -(-height // tile_size)
+
+    # tile edges in mask pixels, each tile covering at least one
+    scale = downsample / mask_downsample
+    mask_h, mask_w = mask.shape
+
+    def edges(count: int, limit: int) -> tuple[np.ndarray, np.ndarray]:
+        start = np.floor(np.arange(count) * tile_size * scale).astype(np.intp)
+        end = np.floor(np.arange(1, count + 1) * tile_size * scale).astype(
+            np.intp
+        )
+        start = np.minimum(start, limit - 1)
+        end = np.clip(end, start + 1, limit)
+        return start, end
+
+    x0, x1 = edges(cols, mask_w)
+    y0, y1 = edges(rows, mask_h)
+    # summed-area table with a zero row and column in front
+    sat = np.zeros((mask_h + 1, mask_w + 1), dtype=np.int64)
+    sat[1:, 1:] = mask.cumsum(axis=0).cumsum(axis=1)
+    sums = (
+        sat[y1[:, None], x1[None, :]]
+        - sat[y0[:, None], x1[None, :]]
+        - sat[y1[:, None], x0[None, :]]
+        + sat[y0[:, None], x0[None, :]]
+    )
+    areas = (y1 - y0)[:, None] * (x1 - x0)[None, :]
+    selected = (sums > 0) & (sums > min_fraction * areas)
+
+    row_idx, col_idx = np.nonzero(selected)
+    px = col_idx * tile_size
+    py = row_idx * tile_size
+    return TissueTiles(
+        slide=slide,
+        level=level,
+        tile_size=tile_size,
+        x=(px * downsample).astype(np.int64),
+        y=(py * downsample).astype(np.int64),
+        w=np.minimum(tile_size, width - px),
+        h=np.minimum(tile_size, height - py),
+        total=cols * rows,
+    )
@@ -0,0 +1,97 @@
+#
+# openslide-bin - Wrapper for OpenSlide binary build
+#
+# Copyright (c) 2026 Benjamin Gilbert
+#
+# This library is free software; you can redistribute it and/or modify it
+# under the terms of version 2.1 of the GNU Lesser General Public License
+# as published by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
+# License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+'''Slides in worker processes.
+
+Handles can't be pickled or inherited across fork().  Instead, pass a
+SlideRef to workers, such as those of a ProcessPoolExecutor or a
+multiprocessing data loader.  A SlideRef opens its slide on first use in
+each process, from a per-process SlidePool, so a worker opens each slide
+once no matter how many tasks use it:
+
+    ref = SlideRef('slide.svs')
+    with ProcessPoolExecutor() as executor:
+        tiles = executor.map(ref.read_region, levels, xs, ys, ws, hs)'''
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+import os
+import threading
+
+from openslide_bin.handle import Slide
+from openslide_bin.pool import SlidePool
+from openslide_bin.region import Region, read_region
+
+# handles each worker keeps open
+DEFAULT_MAX_HANDLES = 16
+
+_pool: SlidePool | None = None
+_pool_lock = threading.Lock()
+
+
+def worker_pool() -> SlidePool:
+    '''Return this process's SlidePool, creating it on first use.  A fork()
+    child gets a new one.'''
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SlidePool(max_handles=DEFAULT_MAX_HANDLES)
+        return _pool
+
+
+def _after_fork_in_child() -> None:
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+@dataclass(frozen=True)
+class SlideRef:
+    '''A picklable reference to a slide file.'''
+
+    path: str
+
+    def __init__(self, path: str | os.PathLike[str]):
+        object.__setattr__(self, 'path', os.fspath(path))
+
+    def __reduce__(self) -> tuple[type[SlideRef], tuple[str]]:
+        return (self.__class__, (self.path,))
+
+    @contextmanager
+    def checkout(self) -> Iterator[Slide]:
+        '''Check out a handle from this process's pool.  Don't close it or
+        keep it after the context exits.'''
+        with worker_pool().checkout(self.path) as slide:
+            yield slide
+
+    def read_region(
+        self, level: int, x: int, y: int, w: int, h: int
+    ) -> bytearray:
+        '''Read a region and return its premultiplied ARGB pixels.'''
+        region = Region(level, x, y, w, h)
+        buf = bytearray(region.nbytes)
+        with self.checkout() as slide:
+            read_region(slide, buf, *region)
+        return buf
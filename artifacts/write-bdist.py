@@ -23,10 +23,11 @@ from __future__ import annotations
 import argparse
 from pathlib import Path, PurePath
 import re
-from typing import BinaryIO
+from typing import BinaryIO, cast
 
 from common.archive import (
     ArchiveWriter,
+    DirArchiveWriter,
     FileMember,
     SymlinkMember,
     TarArchiveWriter,
@@ -39,7 +40,8 @@ from common.software import Project
 
 class Args(TypedArgs):
     artifacts: list[Path]
-    output: BinaryIO
+    output: BinaryIO | None
+    stage: Path | None
 
 
 args = Args('write-bdist', description='Write bdist archive.')
@@ -47,9 +49,14 @@ args.add_arg(
     '-o',
     '--output',
     type=argparse.FileType('wb'),
-    required=True,
     help='output file',
 )
+args.add_arg(
+    '-s',
+    '--stage',
+    type=Path,
+    help='output directory, for a staged tree instead of an archive',
+)
 args.add_arg(
     'artifacts',
     metavar='artifact',
@@ -58,11 +65,15 @@ args.add_arg(
     help='built artifact',
 )
 args.parse()
+if (args.output is None) == (args.stage is None):
+    args.parser.error('exactly one of --output and --stage is required')
 
-if meson_host() == 'windows':
-    arc: ArchiveWriter = ZipArchiveWriter(args.output)
+if args.stage is not None:
+    arc: ArchiveWriter = DirArchiveWriter(args.stage)
+elif meson_host() == 'windows':
+    arc = ZipArchiveWriter(cast(BinaryIO, args.output))
 else:
-    arc = TarArchiveWriter(args.output)
+    arc = TarArchiveWriter(cast(BinaryIO, args.output))
 with arc:
     for path in args.artifacts:
         name = path.name
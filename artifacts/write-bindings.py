@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+#
+# Tools for building OpenSlide and its dependencies
+#
+# Copyright (c) 2026 Benjamin Gilbert
+# All rights reserved.
+#
+# This script is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License, version 2.1,
+# as published by the Free Software Foundation.
+#
+# This script is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this script. If not, see <http://www.gnu.org/licenses/>.
+#
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import re
+from typing import TextIO
+
+from common.argparse import TypedArgs
+
+# C type, with "const" removed and whitespace normalized -> ctypes type
+CTYPES = {
+    'void': 'None',
+    'bool': 'c_bool',
+    'double': 'c_double',
+    'int32_t': 'c_int32',
+    'int64_t': 'c_int64',
+    'size_t': 'c_size_t',
+    'char *': 'c_char_p',
+    'char **': 'POINTER(c_char_p)',
+    'int64_t *': 'POINTER(c_int64)',
+    'uint32_t *': 'POINTER(c_uint32)',
+    'void *': 'c_void_p',
+    # opaque handles
+    'openslide_t *': 'c_void_p',
+    'openslide_cache_t *': 'c_void_p',
+}
+
+# followed by the ctypes import
+HEADER = '''#
+# openslide-bin - Wrapper for OpenSlide binary build
+#
+# This file was generated by write-bindings.py from the OpenSlide headers.
+# Do not edit.
+#
+
+\'\'\'ctypes prototypes for the OpenSlide C API.
+
+Each function is looked up in libopenslide1 and declared on first access,
+then cached.  These function objects are separate from the attributes of
+libopenslide1, so declarations made by other users of the library don't
+affect them.\'\'\'
+
+from __future__ import annotations
+
+'''
+
+FOOTER = '''
+_lock = threading.Lock()
+
+
+def __getattr__(name: str) -> Any:
+    try:
+        restype, argtypes = _PROTOTYPES[name]
+    except KeyError:
+        raise AttributeError(
+            f'module {__name__!r} has no attribute {name!r}'
+        ) from None
+    with _lock:
+        # another thread may have declared it while we waited
+        func = globals().get(name)
+        if func is None:
+            from . import libopenslide1
+
+            func = libopenslide1[name]
+            func.restype = restype
+            func.argtypes = argtypes
+            # bypass __getattr__ from now on
+            globals()[name] = func
+    return func
+'''
+
+
+class Args(TypedArgs):
+    output: TextIO
+    headers: list[Path]
+
+
+def ctype(decl: str) -> str:
+    '''Convert a C type to the corresponding ctypes expression.'''
+    norm = re.sub('\\bconst\\b', '', decl)
+    norm = re.sub('\\s+', ' ', norm.replace('*', ' * ')).strip()
+    norm = norm.replace('* *', '**')
+    try:
+        return CTYPES[norm]
+    except KeyError:
+        raise Exception(f'Unknown C type: {decl.strip()}')
+
+
+def parse_param(param: str) -> str:
+    '''Convert a C parameter declaration to a ctypes type.'''
+    match = re.fullmatch('(.*?)\\b\\w+', param.strip(), re.DOTALL)
+    if not match:
+        raise Exception(f"Couldn't parse parameter: {param.strip()}")
+    return ctype(match[1])
+
+
+args = Args('write-bindings', description='Write Python ctypes bindings.')
+args.add_arg(
+    '-o',
+    '--output',
+    type=argparse.FileType('w'),
+    required=True,
+    help='output file',
+)
+args.add_arg(
+    'headers',
+    metavar='header',
+    nargs='+',
+    type=Path,
+    help='OpenSlide header',
+)
+args.parse()
+
+# name -> (restype, argtypes)
+prototypes: dict[str, tuple[str, list[str]]] = {}
+# name -> value
+constants: dict[str, str] = {}
+for header in args.headers:
+    # drop comments and preprocessor line continuations
+    text = re.sub('/\\*.*?\\*/', '', header.read_text(), flags=re.DOTALL)
+    text = re.sub('//[^\n]*', '', text).replace('\\\n', '')
+    for match in re.finditer(
+        '^#define\\s+(OPENSLIDE_PROPERTY_NAME_\\w+)\\s+("[^"]*")\\s*$',
+        text,
+        re.MULTILINE,
+    ):
+        constants[match[1]] = match[2]
+    # every public declaration must parse, so a prototype can't silently
+    # go missing
+    text = re.sub('^\\s*#[^\n]*', '', text, flags=re.MULTILINE)
+    decls = text.split('OPENSLIDE_PUBLIC()')[1:]
+    for decl in decls:
+        decl = re.sub('^\\s*OPENSLIDE_DEPRECATED\\w*\\([^)]*\\)', '', decl)
+        m = re.match(
+            '\\s*([^;(]*?)\\b(openslide_\\w+)\\s*\\(([^)]*)\\)\\s*;',
+            decl,
+            re.DOTALL,
+        )
+        if not m:
+            raise Exception(f"Couldn't parse declaration: {decl.strip()[:80]}")
+        restype = ctype(m[1])
+        params = [p for p in m[3].split(',') if p.strip() != 'void']
+        prototypes[m[2]] = (restype, [parse_param(p) for p in params])
+if not prototypes:
+    raise Exception('No OpenSlide functions found')
+
+used = sorted(
+    {
+        name
+        for restype, argtypes in prototypes.values()
+        for t in [restype, *argtypes]
+        for name in re.findall('[A-Za-z_]\\w*', t)
+        if name != 'None'
+    },
+    key=lambda name: (not name.isupper(), name),
+)
+
+with args.output as fh:
+    fh.write(HEADER)
+    fh.write(
+        'from ctypes import (\n'
+        + ''.join(f'    {name},\n' for name in used)
+        + ')\nimport threading\nfrom typing import TYPE_CHECKING, Any\n\n'
+    )
+    if constants:
+        fh.write('# Standard property names\n')
+        for name, value in sorted(constants.items()):
+            fh.write(f'{name} = {value[1:-1]!r}\n')
+        fh.write('\n')
+    fh.write('_PROTOTYPES: dict[str, tuple[Any, list[Any]]] = {\n')
+    for name, (restype, argtypes) in sorted(prototypes.items()):
+        fh.write(f'    \'{name}\': (\n        {restype},\n')
+        line = f'        [{", ".join(argtypes)}],'
+        if len(line) > 79:
+            # one per line, as black would
+            line = (
+                '        [\n'
+                + ''.join(f'            {a},\n' for a in argtypes)
+                + '        ],'
+            )
+        fh.write(f'{line}\n    ),\n')
+    fh.write('}\n\n')
+    # declare the functions for type checkers
+    fh.write(
+        'if TYPE_CHECKING:\n'
+        + ''.join(f'    {name}: Any\n' for name in sorted(prototypes))
+    )
+    fh.write(
+        '\n__all__ = [\n'
+        + ''.join(f'    \'{name}\',\n' for name in sorted(constants))
+        + ''.join(f'    \'{name}\',\n' for name in sorted(prototypes))
+        + ']\n'
+    )
+    fh.write(FOOTER)
@@ -29,8 +29,10 @@ from functools import cached_property
 from hashlib import sha256
 from io import BytesIO
 from itertools import zip_longest
+import os
 from pathlib import Path, PurePath
 import re
+import shutil
 import tarfile
 import tempfile
 import time
@@ -181,6 +183,33 @@ class ZipArchiveWriter(ArchiveWriter):
         self._zip.close()
 
 
+class DirArchiveWriter(ArchiveWriter):
+    '''Write members to a staged directory tree instead of an archive.'''
+
+    def __init__(self, path: Path):
+        super().__init__(path)
+        self._dir = path.parent
+
+    def close(self) -> None:
+        root = self._dir / self.base
+        if root.is_dir() and not root.is_symlink():
+            shutil.rmtree(root)
+        for _, member in sorted(self._members.items()):
+            path = self._dir / member.path
+            if isinstance(member, FileMember):
+                with path.open('wb') as fh:
+                    shutil.copyfileobj(member.fh, fh)
+                try:
+                    mode = os.fstat(member.fh.fileno()).st_mode
+                except (AttributeError, OSError):
+                    mode = 0o644
+                path.chmod(mode & ~0o022 | 0o644)
+            elif isinstance(member, DirMember):
+                path.mkdir(parents=True, exist_ok=True)
+            elif isinstance(member, SymlinkMember):
+                path.symlink_to(member.target)
+
+
 class WheelWriter(ZipArchiveWriter):
     def __init__(self, fh: BinaryIO):
         (
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+#
+# Tools for building OpenSlide and its dependencies
+#
+# Copyright (c) 2026 Benjamin Gilbert
+# All rights reserved.
+#
+# This script is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License, version 2.1,
+# as published by the Free Software Foundation.
+#
+# This script is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this script. If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Compare a shared tile cache against per-handle caches, with many handles
+# reading the same tiles.  Usage: bench-cache.py [slide...]
+#
+# Each configuration runs in a fresh process, so peak RSS is comparable.
+# OpenSlide doesn't report cache statistics, so the hit rate is estimated:
+# a tile counts as a hit if rereading it takes less than half as long as
+# the first read.
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+HANDLES = 100
+TILES_PER_HANDLE = 64
+SHARED_CAPACITY = 64 << 20
+
+
+def peak_rss() -> int | None:
+    try:
+        import resource
+    except ImportError:
+        # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def run(slides: Sequence[str], shared: bool) -> dict[str, float | None]:
+    os.environ['OPENSLIDE_DEBUG'] = 'synthetic'
+    from openslide_bin import bindings
+    from openslide_bin.cache import Cache
+    from openslide_bin.handle import Slide
+    from openslide_bin.region import Region, read_region
+
+    def prop(slide: Slide, name: str) -> int:
+        value: bytes = bindings.openslide_get_property_value(
+            slide, name.encode()
+        )
+        return int(value)
+
+    def tiles(slide: Slide) -> list[Region]:
+        tw = prop(slide, 'openslide.level[0].tile-width')
+        th = prop(slide, 'openslide.level[0].tile-height')
+        w = prop(slide, 'openslide.level[0].width')
+        h = prop(slide, 'openslide.level[0].height')
+        return [
+            Region(0, x, y, tw, th)
+            for y in range(0, h - th + 1, th)
+            for x in range(0, w - tw + 1, tw)
+        ][:TILES_PER_HANDLE]
+
+    def read_all(handles: list[Slide]) -> tuple[float, list[float]]:
+        latencies = []
+        start = time.perf_counter()
+        for slide in handles:
+            for region in tiles(slide):
+                buf = bytearray(region.nbytes)
+                t = time.perf_counter()
+                read_region(slide, buf, *region)
+                latencies.append(time.perf_counter() - t)
+        return time.perf_counter() - start, latencies
+
+    cache = Cache(SHARED_CAPACITY) if shared else None
+    handles = []
+    for i in range(HANDLES):
+        path = slides[i % len(slides)]
+        handles.append(cache.open(path) if cache else Slide(path))
+    cold, cold_latencies = read_all(handles)
+    warm, warm_latencies = read_all(handles)
+    hits = sum(w < c / 2 for c, w in zip(cold_latencies, warm_latencies))
+    for slide in handles:
+        slide.close()
+    if cache:
+        cache.release()
+    return {
+        'cold seconds': cold,
+        'warm seconds': warm,
+        'estimated hit rate': hits / len(warm_latencies),
+        'peak rss': peak_rss(),
+    }
+
+
+def main() -> None:
+    slides = sys.argv[1:] or ['']
+    ctx = multiprocessing.get_context('spawn')
+    results = {}
+    for name, shared in ('per-handle', False), ('shared', True):
+        with ctx.Pool(1) as pool:
+            results[name] = pool.apply(run, (slides, shared))
+    print(json.dumps(results, indent=2, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
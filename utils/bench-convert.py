@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+#
+# Tools for building OpenSlide and its dependencies
+#
+# Copyright (c) 2026 Benjamin Gilbert
+# All rights reserved.
+#
+# This script is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License, version 2.1,
+# as published by the Free Software Foundation.
+#
+# This script is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this script. If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Time ARGB to RGBA conversion of tiles from the synthetic slide, with
+# NumPy, with the pure-Python fallback, and with a naive per-pixel loop,
+# and print the results as a JSON object mapping names to seconds per tile.
+
+from __future__ import annotations
+
+from collections.abc import Callable
+import json
+import os
+import struct
+import time
+
+os.environ['OPENSLIDE_DEBUG'] = 'synthetic'
+
+from openslide_bin import convert  # noqa: E402
+from openslide_bin.handle import Slide  # noqa: E402
+from openslide_bin.region import Region, read_region  # noqa: E402
+
+ROUNDS = 5
+TILE_SIZE = 512
+
+
+def best_time(func: Callable[[], object]) -> float:
+    '''Return the fastest of several runs, which is the least noisy
+    estimate of the workload's cost.'''
+    times = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def naive(src: bytes | bytearray) -> bytearray:
+    '''The per-pixel conversion consumers would otherwise write.'''
+    out = bytearray()
+    for (pixel,) in struct.iter_unpack('=I', src):
+        a = pixel >> 24
+        rgb = [(pixel >> shift) & 0xFF for shift in (16, 8, 0)]
+        if a == 0:
+            rgb = [0, 0, 0]
+        elif a != 255:
+            rgb = [min(255, (c * 255 + a // 2) // a) for c in rgb]
+        out += bytes(rgb + [a])
+    return out
+
+
+with Slide('') as slide:
+    # the synthetic slide is smaller than a tile, so the tile has both
+    # opaque and transparent pixels
+    region = Region(0, 0, 0, TILE_SIZE, TILE_SIZE)
+    tile = bytearray(region.nbytes)
+    read_region(slide, tile, *region)
+dest = bytearray(len(tile))
+
+results: dict[str, float] = {}
+if convert.HAVE_NUMPY:
+    results['numpy'] = best_time(lambda: convert.argb_to_rgba(tile, dest))
+have_numpy = convert.HAVE_NUMPY
+convert.HAVE_NUMPY = False
+results['fallback'] = best_time(lambda: convert.argb_to_rgba(tile, dest))
+convert.HAVE_NUMPY = have_numpy
+results['naive'] = best_time(lambda: naive(tile))
+assert bytes(dest) == naive(tile)
+print(json.dumps(results, indent=2, sort_keys=True))
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+#
+# Tools for building OpenSlide and its dependencies
+#
+# Copyright (c) 2026 Benjamin Gilbert
+# All rights reserved.
+#
+# This script is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License, version 2.1,
+# as published by the Free Software Foundation.
+#
+# This script is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this script. If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Compare a read-ahead level scan against a loop that reads each tile and
+# then processes it, and print the results as a JSON object mapping names
+# to tiles per second.  Usage: bench-scan.py [slide]
+#
+# Processing converts each tile to RGBA, standing in for real consumer work.
+# With no argument, the synthetic slide is scanned repeatedly; it's small and
+# cheap to decode, so a real slide gives more representative numbers.
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+from functools import partial
+import json
+import os
+import sys
+import time
+
+os.environ['OPENSLIDE_DEBUG'] = 'synthetic'
+
+from openslide_bin import convert  # noqa: E402
+from openslide_bin.handle import Slide  # noqa: E402
+from openslide_bin.region import Region  # noqa: E402
+from openslide_bin.scan import scan  # noqa: E402
+
+ROUNDS = 3
+# minimum tiles per round
+TILES = 2000
+TILE_SIZE = 256
+SYNTHETIC_TILE_SIZE = 16
+
+
+def throughput(
+    passes: int, func: Callable[[], Iterable[tuple[Region, bytearray]]]
+) -> float:
+    '''Return the best tiles per second over several rounds of scanning
+    the slide passes times.'''
+    best = 0.0
+    for _ in range(ROUNDS):
+        count = 0
+        start = time.perf_counter()
+        for _ in range(passes):
+            for _, pixels in func():
+                convert.argb_to_rgba(pixels, pixels)
+                count += 1
+        best = max(best, count / (time.perf_counter() - start))
+    return best
+
+
+path = sys.argv[1] if len(sys.argv) > 1 else ''
+tile_size = TILE_SIZE if path else SYNTHETIC_TILE_SIZE
+with Slide(path) as slide:
+    tiles = sum(1 for _ in scan(slide, tile_size=tile_size, prefetch=0))
+    passes = -(-TILES // tiles)
+    results = {
+        'naive': throughput(
+            passes, partial(scan, slide, tile_size=tile_size, prefetch=0)
+        )
+    }
+    for order in 'row-major', 'serpentine':
+        for prefetch in 4, 16:
+            results[f'prefetch {prefetch} {order}'] = throughput(
+                passes,
+                partial(
+                    scan,
+                    slide,
+                    tile_size=tile_size,
+                    order=order,
+                    prefetch=prefetch,
+                ),
+            )
+print(json.dumps(results, indent=2, sort_keys=True))
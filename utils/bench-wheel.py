@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+#
+# Tools for building OpenSlide and its dependencies
+#
+# Copyright (c) 2026 Benjamin Gilbert
+# All rights reserved.
+#
+# This script is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License, version 2.1,
+# as published by the Free Software Foundation.
+#
+# This script is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this script. If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Time a fixed workload against the synthetic slide and print the results
+# as a JSON object mapping metric names to seconds.  The synthetic slide
+# has no associated images, so associated image reads aren't measured.
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from ctypes import byref, c_int64, c_uint32
+import json
+import os
+import subprocess
+import sys
+import time
+
+os.environ['OPENSLIDE_DEBUG'] = 'synthetic'
+
+from openslide_bin.bindings import (  # noqa: E402
+    openslide_close,
+    openslide_get_error,
+    openslide_get_level_count,
+    openslide_get_level_dimensions,
+    openslide_open,
+    openslide_read_region,
+)
+
+ROUNDS = 5
+OPENS_PER_ROUND = 10
+CALLS_PER_ROUND = 10000
+REGION_SIZE = 1024
+
+
+def best_time(func: Callable[[], None]) -> float:
+    '''Return the fastest of several runs, which is the least noisy
+    estimate of the workload's cost.'''
+    times = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def bench_spawn(code: str) -> float:
+    '''Time interpreter startup plus the specified code, approximating the
+    cost of spawning a worker process.'''
+
+    def spawn() -> None:
+        subprocess.check_call([sys.executable, '-c', code])
+
+    return best_time(spawn)
+
+
+def check(osr: int) -> None:
+    err = openslide_get_error(osr)
+    if err is not None:
+        raise Exception(f'OpenSlide error: {err.decode()}')
+
+
+def bench_open() -> None:
+    for _ in range(OPENS_PER_ROUND):
+        osr = openslide_open(b'')
+        assert osr is not None
+        check(osr)
+        openslide_close(osr)
+
+
+def bench_calls(osr: int) -> float:
+    '''Time a batch of trivial calls, to measure the fixed per-call
+    overhead of the bindings.'''
+
+    def call() -> None:
+        for _ in range(CALLS_PER_ROUND):
+            openslide_get_level_count(osr)
+
+    return best_time(call)
+
+
+def bench_region(osr: int, level: int) -> float:
+    w, h = c_int64(), c_int64()
+    openslide_get_level_dimensions(osr, level, byref(w), byref(h))
+    rw, rh = min(w.value, REGION_SIZE), min(h.value, REGION_SIZE)
+    buf = (c_uint32 * (rw * rh))()
+
+    def read() -> None:
+        openslide_read_region(osr, buf, 0, 0, level, rw, rh)
+        check(osr)
+
+    return best_time(read)
+
+
+osr = openslide_open(b'')
+assert osr is not None
+check(osr)
+results: dict[str, float] = {}
+
+results['wheel open'] = best_time(bench_open)
+# the library is loaded on first use, so workers that never touch it
+# shouldn't pay for it
+results['wheel spawn import'] = bench_spawn('import openslide_bin')
+results['wheel spawn load'] = bench_spawn(
+    'import openslide_bin; openslide_bin.libopenslide1'
+)
+results['wheel calls'] = bench_calls(osr)
+for level in range(openslide_get_level_count(osr)):
+    results[f'wheel region level {level}'] = bench_region(osr, level)
+
+openslide_close(osr)
+print(json.dumps(results, indent=2, sort_keys=True))
@@ -20,20 +20,25 @@
 
 from __future__ import annotations
 
-from ctypes import c_char_p, c_void_p
 import os
+import time
 
 os.environ['OPENSLIDE_DEBUG'] = 'synthetic'
 
-import openslide_bin  # noqa: E402
+from openslide_bin import bindings, convert  # noqa: E402
+from openslide_bin.bindings import (  # noqa: E402
+    openslide_get_error,
+    openslide_open,
+)
+from openslide_bin.handle import Slide  # noqa: E402
+from openslide_bin.pool import SlidePool  # noqa: E402
+from openslide_bin.properties import snapshot  # noqa: E402
+from openslide_bin.region import read_region  # noqa: E402
+from openslide_bin.thumbnail import thumbnail  # noqa: E402
 
-openslide_open = openslide_bin.libopenslide1.openslide_open
-openslide_open.argtypes = [c_char_p]
-openslide_open.restype = c_void_p
-
-openslide_get_error = openslide_bin.libopenslide1.openslide_get_error
-openslide_get_error.argtypes = [c_void_p]
-openslide_get_error.restype = c_char_p
+# every declared function must exist in the library
+for name in bindings.__all__:
+    getattr(bindings, name)
 
 osr = openslide_open(b'-----eCRFEcGBT+RN8+6rLZQz5gUA0ymSdPE-----')
 assert osr is None
@@ -41,3 +46,41 @@ assert osr is None
 osr = openslide_open(b'')
 assert osr is not None
 assert openslide_get_error(osr) is None
+
+# idle handles are closed even if the pool isn't used again
+pool = SlidePool(idle_ttl=0.1)
+with pool.checkout(''):
+    pass
+assert pool.stats.handles == 1
+deadline = time.monotonic() + 10
+while pool.stats.handles and time.monotonic() < deadline:
+    time.sleep(0.05)
+assert pool.stats.handles == 0
+
+# invalid UTF-8 in one property value doesn't break the others
+get_property_value = bindings.openslide_get_property_value
+bindings.openslide_get_property_value = lambda osr, name: (
+    get_property_value(osr, name)
+    + (b'\xff' if name == b'synthetic.item.bmp' else b'')
+)
+try:
+    with Slide('') as slide:
+        for props in slide.properties(), snapshot(slide):
+            assert props['synthetic.item.bmp'] == 'BMP\ufffd'
+            assert props['openslide.vendor'] == 'synthetic'
+finally:
+    bindings.openslide_get_property_value = get_property_value
+
+# thumbnails box-filtered a row at a time match whole-level resizes, with
+# and without NumPy
+with Slide('') as slide:
+    level = bytearray(160 * 16 * 4)
+    read_region(slide, level, 0, 0, 0, 160, 16)
+    have_numpy = convert.HAVE_NUMPY
+    try:
+        for convert.HAVE_NUMPY in (have_numpy, False):
+            thumb = thumbnail(slide, (37, 37), strip_bytes=1)
+            assert thumb[:2] == (37, 4)
+            assert thumb.pixels == convert.resize_argb(level, 160, 16, 37, 4)
+    finally:
+        convert.HAVE_NUMPY = have_numpy
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+#
+# Tools for building OpenSlide and its dependencies
+#
+# Copyright (c) 2026 Benjamin Gilbert
+# All rights reserved.
+#
+# This script is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License, version 2.1,
+# as published by the Free Software Foundation.
+#
+# This script is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this script. If not, see <http://www.gnu.org/licenses/>.
+#
+
+from __future__ import annotations
+
+import argparse
+from contextlib import ExitStack
+import os
+import re
+import subprocess
+from typing import BinaryIO
+
+from common.archive import FileMember, WheelWriter, ZipArchiveReader
+from common.argparse import TypedArgs
+
+
+class Args(TypedArgs):
+    base: BinaryIO
+    output: BinaryIO
+    variants: list[str]
+
+
+args = Args(
+    'write-variant-wheel',
+    description='Add CPU-specific library variants to Python wheel.',
+)
+args.add_arg(
+    '-o',
+    '--output',
+    type=argparse.FileType('wb'),
+    required=True,
+    help='output file',
+)
+args.add_arg(
+    'base',
+    type=argparse.FileType('rb'),
+    help='baseline wheel',
+)
+args.add_arg(
+    'variants',
+    metavar='variant=wheel',
+    nargs='+',
+    help='variant name and wheel built for it',
+)
+args.parse()
+
+with ExitStack() as stack:
+    # open readers before the writer, so they're closed after it
+    base = stack.enter_context(ZipArchiveReader(args.base))
+    variants = []
+    for spec in args.variants:
+        variant, path = spec.split('=', 1)
+        fh = stack.enter_context(open(path, 'rb'))
+        variants.append((variant, stack.enter_context(ZipArchiveReader(fh))))
+
+    whl = stack.enter_context(WheelWriter(args.output))
+    for member in base:
+        if member.path.name != 'RECORD':
+            # regenerated by WheelWriter
+            whl.add(member)
+    for variant, reader in variants:
+        found = False
+        for member in reader:
+            if (
+                isinstance(member, FileMember)
+                and member.path.parent == whl.datadir
+                and re.search('\\.(dll|dylib|so\\.[0-9]+)$', member.path.name)
+            ):
+                whl.add(
+                    FileMember(
+                        whl.datadir / variant / member.path.name, member.fh
+                    )
+                )
+                found = True
+        if not found:
+            raise Exception(f'No library found in {variant} wheel')
+
+if whl.platform.startswith('manylinux'):
+    report = subprocess.check_output(
+        [
+            os.environ.get('AUDITWHEEL', 'auditwheel'),
+            'show',
+            args.output.name,
+        ],
+    ).decode()
+    if f'"{whl.platform}"' not in report:
+        raise Exception(f'Wheel audit failed: {report}')